@@ -0,0 +1,44 @@
+from functools import wraps
+
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+def render(request, response):
+    """Render a DRF Response with the first configured renderer"""
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    response.accepted_renderer = renderer
+    response.accepted_media_type = renderer.media_type
+    response.renderer_context = {'request': request, 'response': response}
+    return response.render()
+
+
+def async_api_view(view):
+    """
+    Serve `async def view(request)` as a native async, public POST endpoint.
+
+    DRF's APIView only runs sync handlers, so under ASGI it would hold a
+    worker thread for the whole request. This wrapper keeps the parts of
+    DRF the public auth endpoints rely on: `request.data` parsed by the
+    configured parsers, API exceptions turned into the usual error
+    responses (including Retry-After), and the configured renderer.
+    Authentication, permissions and throttling are not applied, so only
+    use it for endpoints open to anyone. The view runs its ORM work with
+    `sync_to_async` and awaits anything slow.
+    """
+    @csrf_exempt
+    @require_POST
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        try:
+            response = await view(request, *args, **kwargs)
+        except Exception as exc:
+            response = api_settings.EXCEPTION_HANDLER(exc, {'request': request, 'args': args, 'kwargs': kwargs})
+            if response is None:
+                raise
+        return render(request, response)
+
+    return wrapper
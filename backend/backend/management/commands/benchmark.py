@@ -0,0 +1,527 @@
+import fnmatch
+import json
+import math
+import platform
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment
+)
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from backend.celery import app as celery_app
+from backend.query_budget import query_stats
+from connections.adjacency import adjacency_cache
+from connections.counters import record_transitions
+from connections.models import Connection
+from connections.suggestions import rebuild_suggestions
+from notifications.models import Notification
+
+User = get_user_model()
+
+DATASET_PREFIX = 'load'
+DATASET_PASSWORD = 'loadtest123'
+
+SCENARIOS = []
+
+
+def scenario(name, user='typical', max_iterations=None):
+    """
+    Register a benchmark scenario.
+
+    The decorated generator receives the Benchmark and the number of
+    requests wanted and yields `(method, path, data)` tuples. Setup done
+    between yields (creating rows, minting tokens) is not timed. `user` is
+    the authenticated client: 'typical', 'hub' or None for anonymous.
+    """
+    def register(func):
+        SCENARIOS.append({
+            'name': name,
+            'user': user,
+            'max_iterations': max_iterations,
+            'requests': func,
+        })
+        return func
+    return register
+
+
+@scenario('auth.register', user=None, max_iterations=20)
+def register(bench, count):
+    for index in range(count):
+        name = f'bench{bench.run_id}{index}'
+        yield 'post', '/api/auth/register/', {
+            'username': name,
+            'full_name': 'Benchmark User',
+            'email': f'{name}@example.com',
+            'contact': f'b{bench.run_id}{index}',
+            'company': 'Benchmark Inc',
+            'address': '1 Main Street',
+            'industry': 'Technology',
+            'password': 'Bench-pass-123',
+        }
+
+
+@scenario('auth.login', user=None, max_iterations=20)
+def login(bench, count):
+    for _ in range(count):
+        yield 'post', '/api/auth/login/', {
+            'username': bench.users['typical'].username,
+            'password': DATASET_PASSWORD,
+        }
+
+
+@scenario('auth.token_refresh', user=None)
+def token_refresh(bench, count):
+    for _ in range(count):
+        refresh = RefreshToken.for_user(bench.users['typical'])
+        yield 'post', '/api/token/refresh/', {'refresh': str(refresh)}
+
+
+@scenario('auth.logout')
+def logout(bench, count):
+    for _ in range(count):
+        refresh = RefreshToken.for_user(bench.users['typical'])
+        yield 'post', '/api/auth/logout/', {'refresh_token': str(refresh)}
+
+
+@scenario('auth.profile')
+def profile(bench, count):
+    for _ in range(count):
+        yield 'get', '/api/auth/profile/', None
+
+
+@scenario('auth.profile_update')
+def profile_update(bench, count):
+    for index in range(count):
+        yield 'patch', '/api/auth/profile/', {'company': f'Benchmark {index % 2}'}
+
+
+@scenario('auth.search')
+def search(bench, count):
+    for index in range(count):
+        yield 'get', '/api/auth/search/', {'q': ['Smith', 'Tech', 'Garcia', 'Cloud'][index % 4]}
+
+
+@scenario('auth.search_with_status')
+def search_with_status(bench, count):
+    for index in range(count):
+        yield 'get', '/api/auth/search/', {'q': ['Smith', 'Tech', 'Garcia', 'Cloud'][index % 4], 'include_status': 'true'}
+
+
+@scenario('auth.search_short')
+def search_short(bench, count):
+    for index in range(count):
+        yield 'get', '/api/auth/search/', {'q': ['Li', 'Wa', 'Jo'][index % 3]}
+
+
+@scenario('auth.autocomplete')
+def autocomplete(bench, count):
+    for index in range(count):
+        yield 'get', '/api/auth/autocomplete/', {'q': ['Ja', 'Mar', 'Wil', 'Pri'][index % 4]}
+
+
+@scenario('auth.batch_lookup')
+def batch_lookup(bench, count):
+    user_ids = list(User.objects.order_by('?').values_list('user_id', flat=True)[:100])
+    for _ in range(count):
+        yield 'post', '/api/auth/batch/', {'user_ids': user_ids}
+
+
+@scenario('connections.list')
+def connection_list(bench, count):
+    for _ in range(count):
+        yield 'get', '/api/connections/list/', None
+
+
+@scenario('connections.list_hub', user='hub')
+def connection_list_hub(bench, count):
+    for _ in range(count):
+        yield 'get', '/api/connections/list/', {'type': 'received', 'status': 'pending'}
+
+
+@scenario('connections.request')
+def connection_request(bench, count):
+    for receiver in bench.strangers(bench.users['typical'], count):
+        yield 'post', '/api/connections/request/', {'receiver': receiver.username, 'message': 'Hi'}
+
+
+@scenario('connections.request_bulk', max_iterations=20)
+def connection_request_bulk(bench, count):
+    receivers = bench.strangers(bench.users['typical'], count * 10)
+    for index in range(count):
+        usernames = [receiver.username for receiver in receivers[index * 10:(index + 1) * 10]]
+        yield 'post', '/api/connections/request/bulk/', {'receivers': usernames, 'message': 'Hi'}
+
+
+@scenario('connections.respond')
+def connection_respond(bench, count):
+    user = bench.users['typical']
+    senders = bench.strangers(user, count)
+    pending = Connection.objects.bulk_create(Connection.build(sender.id, user.id) for sender in senders)
+    # bulk_create skips the request paths that keep the connection
+    # counters and the cached adjacency current
+    record_transitions((connection.sender_id, connection.receiver_id, None, 'pending') for connection in pending)
+    adjacency_cache.changed(user.id, *(connection.sender_id for connection in pending))
+    for index, connection_request in enumerate(pending):
+        action = 'accept' if index % 2 else 'reject'
+        yield 'post', f'/api/connections/respond/{connection_request.id}/', {'action': action}
+
+
+@scenario('connections.respond_bulk', max_iterations=20)
+def connection_respond_bulk(bench, count):
+    user = bench.users['typical']
+    senders = bench.strangers(user, count * 10)
+    pending = Connection.objects.bulk_create(Connection.build(sender.id, user.id) for sender in senders)
+    record_transitions((connection.sender_id, connection.receiver_id, None, 'pending') for connection in pending)
+    adjacency_cache.changed(user.id, *(connection.sender_id for connection in pending))
+    for index in range(count):
+        connection_ids = [connection.id for connection in pending[index * 10:(index + 1) * 10]]
+        action = 'accept' if index % 2 else 'reject'
+        yield 'post', '/api/connections/respond/', {'connection_ids': connection_ids, 'action': action}
+
+
+@scenario('connections.cancel')
+def connection_cancel(bench, count):
+    user = bench.users['typical']
+    receivers = bench.strangers(user, count)
+    pending = Connection.objects.bulk_create(Connection.build(user.id, receiver.id) for receiver in receivers)
+    record_transitions((connection.sender_id, connection.receiver_id, None, 'pending') for connection in pending)
+    adjacency_cache.changed(user.id, *(connection.receiver_id for connection in pending))
+    for connection_request in pending:
+        yield 'delete', f'/api/connections/cancel/{connection_request.id}/', None
+
+
+@scenario('connections.status')
+def connection_status(bench, count):
+    others = list(User.objects.order_by('?').values_list('id', flat=True)[:count])
+    for index in range(count):
+        yield 'get', f'/api/connections/status/{others[index % len(others)]}/', None
+
+
+@scenario('connections.status_bulk')
+def connection_status_bulk(bench, count):
+    others = list(User.objects.order_by('?').values_list('id', flat=True)[:20])
+    for _ in range(count):
+        yield 'post', '/api/connections/status/', {'user_ids': others}
+
+
+@scenario('connections.suggestions')
+def connection_suggestions(bench, count):
+    for _ in range(count):
+        yield 'get', '/api/connections/suggestions/', None
+
+
+@scenario('notifications.list')
+def notification_list(bench, count):
+    for _ in range(count):
+        yield 'get', '/api/notifications/', None
+
+
+@scenario('notifications.unread_count')
+def notification_unread_count(bench, count):
+    for _ in range(count):
+        yield 'get', '/api/notifications/unread_count/', None
+
+
+@scenario('notifications.mark_as_read')
+def notification_mark_as_read(bench, count):
+    for notification in bench.notifications(count):
+        yield 'post', f'/api/notifications/{notification.id}/mark_as_read/', None
+
+
+@scenario('notifications.mark_all_as_read')
+def notification_mark_all_as_read(bench, count):
+    for _ in range(count):
+        yield 'post', '/api/notifications/mark_all_as_read/', None
+
+
+@scenario('notifications.soft_delete')
+def notification_soft_delete(bench, count):
+    for notification in bench.notifications(count):
+        yield 'delete', f'/api/notifications/{notification.id}/soft_delete/', None
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Benchmark:
+    """Dataset handles shared by the scenarios of one run"""
+
+    def __init__(self, users):
+        self.users = users
+        self.run_id = uuid.uuid4().hex[:6]
+
+    def strangers(self, user, count):
+        """Users with no connection to `user` in either direction"""
+        connected = set()
+        for sender_id, receiver_id in Connection.objects.filter(
+            Q(sender=user) | Q(receiver=user)
+        ).values_list('sender_id', 'receiver_id'):
+            connected.update((sender_id, receiver_id))
+        strangers = list(
+            User.objects.exclude(id__in=connected).exclude(id=user.id).order_by('id')[:count]
+        )
+        if len(strangers) < count:
+            raise CommandError(f'Not enough unconnected users for {count} requests; seed more --users')
+        return strangers
+
+    def notifications(self, count):
+        user = self.users['typical']
+        return Notification.objects.bulk_create(
+            Notification(
+                user=user,
+                sender=self.users['hub'],
+                notification_type='general',
+                title='Benchmark',
+                message='Benchmark notification'
+            )
+            for _ in range(count)
+        )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API endpoint against a seeded test database and report latency and query counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            default=[],
+            help='Only run scenarios matching this glob (e.g. "connections.*"); repeatable'
+        )
+        parser.add_argument('--users', type=int, default=2000, help='Users in the seeded dataset')
+        parser.add_argument('--avg-connections', type=float, default=10, help='Passed to generate_dataset')
+        parser.add_argument('--notifications-per-user', type=int, default=5, help='Passed to generate_dataset')
+        parser.add_argument('--seed', type=int, default=42, help='Dataset random seed')
+        parser.add_argument(
+            '--db-name',
+            help='SQLite file for the benchmark database (default: in memory)'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the benchmark database and reuse an existing one without reseeding'
+        )
+        parser.add_argument('--output', help='Write JSON results to this file')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--list', action='store_true', help='List scenarios and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for entry in SCENARIOS:
+                self.stdout.write(entry['name'])
+            return
+        if options['iterations'] < 1 or options['warmup'] < 0:
+            raise CommandError('--iterations must be positive and --warmup not negative')
+
+        scenarios = [
+            entry for entry in SCENARIOS
+            if not options['scenario']
+            or any(fnmatch.fnmatch(entry['name'], pattern) for pattern in options['scenario'])
+        ]
+        if not scenarios:
+            raise CommandError('No scenario matches --scenario')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        setup_test_environment()
+        if options['db_name']:
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = options['db_name']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+            keepdb=options['keepdb']
+        )
+        # Run notification tasks inline instead of queueing them on the broker
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        try:
+            self.seed(options)
+            results = self.run(scenarios, options)
+        finally:
+            celery_app.conf.task_always_eager = always_eager
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.report(results, baseline)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def seed(self, options):
+        if User.objects.filter(username__startswith=f'{DATASET_PREFIX}_').exists():
+            self.stdout.write('Reusing seeded benchmark database')
+            return
+        call_command(
+            'generate_dataset',
+            users=options['users'],
+            avg_connections=options['avg_connections'],
+            notifications_per_user=options['notifications_per_user'],
+            seed=options['seed'],
+            prefix=DATASET_PREFIX,
+            password=DATASET_PASSWORD,
+            stdout=self.stdout
+        )
+        rebuild_suggestions()
+
+    def pick_users(self):
+        """The median and the most requested user by received connections"""
+        degrees = list(
+            Connection.objects.values_list('receiver').annotate(total=Count('id')).order_by('total', 'receiver')
+        )
+        if not degrees:
+            raise CommandError('The benchmark dataset has no connections')
+        return {
+            'typical': User.objects.get(id=degrees[len(degrees) // 2][0]),
+            'hub': User.objects.get(id=degrees[-1][0]),
+        }
+
+    def run(self, scenarios, options):
+        users = self.pick_users()
+        bench = Benchmark(users)
+        clients = {None: APIClient()}
+        for role, user in users.items():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+            clients[role] = client
+
+        results = {
+            'meta': self.metadata(options, users),
+            'scenarios': {},
+        }
+        query_stats.reset()
+        for entry in scenarios:
+            iterations = options['iterations']
+            if entry['max_iterations']:
+                iterations = min(iterations, entry['max_iterations'])
+            warmup = min(options['warmup'], iterations)
+            self.stdout.write(f'Running {entry["name"]} ({iterations} requests)...')
+            results['scenarios'][entry['name']] = self.run_scenario(
+                entry, bench, clients[entry['user']], warmup, iterations
+            )
+        # Per-view totals from QueryBudgetMiddleware, warmup requests included
+        results['views'] = query_stats.snapshot()
+        return results
+
+    def run_scenario(self, entry, bench, client, warmup, iterations):
+        latencies = []
+        queries = []
+        statuses = {}
+        errors = 0
+        started = time.perf_counter()
+        requests = entry['requests'](bench, warmup + iterations)
+        for index, (method, path, data) in enumerate(requests):
+            send = getattr(client, method)
+            kwargs = {} if method == 'get' else {'format': 'json'}
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = send(path, data, **kwargs)
+                elapsed = time.perf_counter() - request_started
+            if index < warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if response.status_code >= 400:
+                errors += 1
+        wall_time = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'status_codes': statuses,
+            'latency_ms': {
+                'min': latencies[0],
+                'mean': sum(latencies) / len(latencies),
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1],
+            },
+            # Serial throughput of a single client, excluding untimed setup
+            'throughput_rps': len(latencies) / (sum(latencies) / 1000),
+            'queries': {
+                'min': min(queries),
+                'mean': sum(queries) / len(queries),
+                'max': max(queries),
+            },
+            'wall_time_s': wall_time,
+        }
+
+    def metadata(self, options, users):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'dataset': {
+                'users': User.objects.count(),
+                'connections': Connection.objects.count(),
+                'notifications': Notification.objects.count(),
+                'seed': options['seed'],
+            },
+            'typical_user_connections': Connection.objects.filter(receiver=users['typical']).count(),
+            'hub_user_connections': Connection.objects.filter(receiver=users['hub']).count(),
+        }
+
+    def report(self, results, baseline=None):
+        baseline_scenarios = (baseline or {}).get('scenarios', {})
+        header = f'{"scenario":<32}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"req/s":>9}{"queries":>9}{"errors":>8}'
+        if baseline_scenarios:
+            header += f'{"p50 vs base":>13}{"queries vs base":>17}'
+        self.stdout.write(header)
+        for name, result in results['scenarios'].items():
+            latency = result['latency_ms']
+            line = (
+                f'{name:<32}{latency["p50"]:>9.2f}{latency["p95"]:>9.2f}{latency["p99"]:>9.2f}'
+                f'{result["throughput_rps"]:>9.1f}{result["queries"]["mean"]:>9.1f}{result["errors"]:>8}'
+            )
+            previous = baseline_scenarios.get(name)
+            if previous:
+                change = (latency['p50'] / previous['latency_ms']['p50'] - 1) * 100
+                query_change = result['queries']['mean'] - previous['queries']['mean']
+                line += f'{change:>+12.1f}%{query_change:>+17.1f}'
+            style = self.style.ERROR if result['errors'] else self.style.SUCCESS
+            self.stdout.write(style(line))
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def get_budget_settings():
+    return {
+        'HEADERS': settings.DEBUG,
+        'DEFAULT': None,
+        'VIEWS': {},
+        **getattr(settings, 'QUERY_BUDGET', {}),
+    }
+
+
+def get_query_budget(view_name):
+    """Maximum queries allowed for a view name, or None if unbounded"""
+    budget_settings = get_budget_settings()
+    return budget_settings['VIEWS'].get(view_name, budget_settings['DEFAULT'])
+
+
+class QueryRecorder:
+    """Counts queries and their total time across every database alias"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class QueryStats:
+    """Per-view query count and DB time aggregated over the process lifetime"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def add(self, view_name, count, duration, over_budget=False):
+        with self.lock:
+            stats = self.views.get(view_name)
+            if stats is None:
+                stats = self.views[view_name] = {
+                    'requests': 0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_time': 0.0,
+                    'max_db_time': 0.0,
+                    'over_budget': 0,
+                }
+            stats['requests'] += 1
+            stats['queries'] += count
+            stats['max_queries'] = max(stats['max_queries'], count)
+            stats['db_time'] += duration
+            stats['max_db_time'] = max(stats['max_db_time'], duration)
+            if over_budget:
+                stats['over_budget'] += 1
+
+    def snapshot(self):
+        """Copy of the aggregates with per-request means added"""
+        with self.lock:
+            return {
+                view_name: {
+                    **stats,
+                    'mean_queries': stats['queries'] / stats['requests'],
+                    'mean_db_time': stats['db_time'] / stats['requests'],
+                }
+                for view_name, stats in self.views.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+query_stats = QueryStats()
+
+
+class QueryBudgetMiddleware:
+    """
+    Record the SQL query count and DB time of every request.
+
+    The totals are attached to the response as `db_queries` and `db_time`
+    (seconds), added as X-DB-Query-Count / X-DB-Time-Ms headers when
+    QUERY_BUDGET['HEADERS'] is on (DEBUG by default), aggregated per view
+    in `query_stats`, and a warning is logged when a view exceeds its
+    QUERY_BUDGET entry. Queries run while a streaming response is being
+    consumed happen after the middleware returns and are not counted.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI, so async views are not run on a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Connections are per thread and an async request runs its ORM work
+        # on its thread-sensitive sync_to_async thread, so record there
+        recorder = QueryRecorder()
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(recorder.record())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        response.db_queries = recorder.count
+        response.db_time = recorder.duration
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        if view_name:
+            budget = get_query_budget(view_name)
+            over_budget = budget is not None and recorder.count > budget
+            query_stats.add(view_name, recorder.count, recorder.duration, over_budget)
+            if over_budget:
+                logger.warning(
+                    '%s %s ran %d queries, over the budget of %d for %s',
+                    request.method, request.path, recorder.count, budget, view_name
+                )
+
+        if get_budget_settings()['HEADERS']:
+            response['X-DB-Query-Count'] = str(recorder.count)
+            response['X-DB-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+        return response
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase helpers that keep hot paths within their query budget.
+
+    `assertWithinQueryBudget(response)` checks a test client response
+    against the QUERY_BUDGET entry of the view that served it (or an
+    explicit `budget`); `assertMaxQueries(n)` bounds any block of code.
+    """
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        view_name = response.resolver_match.view_name
+        if budget is None:
+            budget = get_query_budget(view_name)
+        if budget is None:
+            self.fail(f'No query budget is configured for {view_name}')
+        if not hasattr(response, 'db_queries'):
+            self.fail('QueryBudgetMiddleware is not installed')
+        self.assertLessEqual(
+            response.db_queries,
+            budget,
+            f'{view_name} ran {response.db_queries} queries, over its budget of {budget}'
+        )
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        self.assertLessEqual(recorder.count, budget, f'{recorder.count} queries run, over the budget of {budget}')
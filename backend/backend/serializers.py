@@ -0,0 +1,60 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class EagerLoadingMixin:
+    """
+    ModelSerializer mixin that loads nested relations up front.
+
+    `setup_eager_loading(queryset)` select_related()s every nested
+    ModelSerializer backed by a forward foreign key and, with only(),
+    fetches just the columns those nested serializers render. Both lists
+    are derived from the declared fields, so a page stays a single query
+    as fields are added. Nested serializers with fields that are not model
+    columns (method fields, properties) get every column of their model.
+    """
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        related, columns = get_eager_loading_paths(cls(), queryset.model)
+        if not related:
+            return queryset
+        return queryset.select_related(*related).only(*columns)
+
+
+def get_eager_loading_paths(serializer, model, prefix=''):
+    """The select_related() paths and only() columns for a serializer"""
+    related = []
+    columns = []
+    restrict = True
+    renders = set()
+
+    for field in serializer.fields.values():
+        if field.source == '*':
+            restrict = False
+            continue
+        source = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            restrict = False
+            continue
+
+        forward_relation = model_field.concrete and (model_field.many_to_one or model_field.one_to_one)
+        if isinstance(field, serializers.ModelSerializer) and forward_relation:
+            nested_related, nested_columns = get_eager_loading_paths(
+                field, model_field.related_model, f'{prefix}{source}__'
+            )
+            related.append(f'{prefix}{source}')
+            related.extend(nested_related)
+            columns.extend(nested_columns)
+        elif not model_field.concrete:
+            restrict = False
+        renders.add(source)
+
+    # The top-level model is never restricted; its rows are what the page is
+    if not prefix or not restrict:
+        renders = {model_field.name for model_field in model._meta.concrete_fields}
+    renders.add(model._meta.pk.name)
+    columns.extend(f'{prefix}{name}' for name in sorted(renders))
+    return related, columns
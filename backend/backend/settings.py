@@ -46,18 +46,20 @@ INSTALLED_APPS = [
     "django_celery_beat",
     "users",
     "connections",
-    "notifications"
+    "notifications",
+    # Project-wide management commands (benchmark)
+    "backend"
 ]
 
 # REST framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "backend.pagination.KeysetPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
@@ -75,13 +77,81 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is recorded by BufferedTokenObtainPairSerializer instead
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.BufferedTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RevocableTokenRefreshSerializer',
     'SIGNING_KEY': SECRET_KEY,
     'ALGORITHM': 'HS256',
 }
 
+# Revoked refresh tokens (users.blacklist): Bloom filter sizing, how often
+# each process picks up revocations made elsewhere (re-reading the last
+# SYNC_OVERLAP seconds for late commits and clock skew), and pruning batch size
+TOKEN_BLACKLIST = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 5,
+    'SYNC_OVERLAP': 30,
+    'REBUILD_INTERVAL': 3600,
+    'PRUNE_CHUNK_SIZE': 1000,
+}
+
+# JWT-only logins: skip the session write in login_view and coalesce
+# last_login updates into periodic batched UPDATEs
+STATELESS_LOGIN = True
+
+LAST_LOGIN_BUFFER = {
+    'FLUSH_INTERVAL': 30,
+    'MAX_PENDING': 1000,
+}
+
+# Bounded pool that runs password hashing for login and registration;
+# requests beyond MAX_PENDING get a 503 instead of queueing on the CPU
+PASSWORD_HASHING_POOL = {
+    'MAX_WORKERS': 4,
+    'MAX_PENDING': 32,
+    'TIMEOUT': 10,
+    'RETRY_AFTER': 1,
+}
+
+# "People you may know" (connections.suggestions): score weights, rows kept
+# per user, friends above MAX_FANOUT accepted connections are not expanded
+CONNECTION_SUGGESTIONS = {
+    'MUTUAL_WEIGHT': 10,
+    'COMPANY_WEIGHT': 5,
+    'INDUSTRY_WEIGHT': 2,
+    'MAX_PER_USER': 20,
+    'MAX_FANOUT': 200,
+    'COLLEAGUES_PER_COMPANY': 20,
+    'BATCH_SIZE': 500,
+}
+
+# Per-request SQL instrumentation (backend.query_budget): X-DB-* headers,
+# and the most queries a view may run before a warning is logged. Tests
+# assert the same budgets with QueryBudgetTestMixin.
+QUERY_BUDGET = {
+    'HEADERS': DEBUG,
+    'DEFAULT': None,
+    'VIEWS': {
+        'users:profile': 2,
+        'users:search': 3,
+        'users:autocomplete': 3,
+        'users:batch': 2,
+        'connections:bulk_request': 9,
+        'connections:list': 3,
+        'connections:bulk_respond': 6,
+        'connections:status': 2,
+        'connections:bulk_status': 2,
+        'connections:suggestions': 3,
+        'notifications:notification-list': 3,
+        'notifications:notification-unread-count': 2,
+    },
+}
+
 
 MIDDLEWARE = [
+    "backend.query_budget.QueryBudgetMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -122,6 +192,37 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Users resolved from JWTs; short-lived and per process
+    "auth_users": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "auth-users",
+        "TIMEOUT": 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
+    },
+    # Per-user connection adjacency (connections.adjacency) and the versions
+    # that retire it after each change. Versions are bumped with incr(), so
+    # point this at a shared backend (e.g. RedisCache) when several
+    # processes serve requests; local memory only suits a single process
+    "adjacency": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "adjacency",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -166,6 +267,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = [
+    'users.backends.PooledModelBackend',
+]
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -202,6 +307,16 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
+CELERY_BEAT_SCHEDULE = {
+    'prune-revoked-tokens': {
+        'task': 'users.tasks.prune_revoked_tokens',
+        'schedule': timedelta(hours=1),
+    },
+    'rebuild-connection-suggestions': {
+        'task': 'connections.tasks.rebuild_connection_suggestions',
+        'schedule': timedelta(days=1),
+    },
+}
 
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -0,0 +1,51 @@
+from itertools import count
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.test import APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from .query_budget import QueryBudgetTestMixin
+
+contacts = count(1000000000)
+
+
+def make_user(name, **fields):
+    """A user named `name` with a unique contact and no usable password"""
+    return get_user_model().objects.create_user(
+        username=name,
+        email=f'{name}@example.com',
+        full_name=name.title(),
+        contact=str(next(contacts)),
+        **fields
+    )
+
+
+class QueryBudgetTestCase(QueryBudgetTestMixin, APITransactionTestCase):
+    """
+    Base for tests that check endpoints against their QUERY_BUDGET.
+
+    A transaction test case runs atomic blocks as they run in production,
+    rather than as savepoints the middleware would count. Queued Celery
+    tasks are not sent, so they neither reach the broker nor add queries.
+    Subclasses create their data, then call `authenticate()` and
+    `clear_caches()` so the first request starts cold.
+    """
+
+    def setUp(self):
+        patcher = mock.patch('celery.app.task.Task.apply_async')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def authenticate(self, user, client=None):
+        client = client or self.client
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def clear_caches(self):
+        from users.autocomplete import autocomplete_index
+
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        autocomplete_index.invalidate()
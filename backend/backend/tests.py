@@ -0,0 +1,70 @@
+import base64
+import json
+from urllib.parse import parse_qs, urlparse
+
+from rest_framework.test import APITestCase
+from notifications.models import Notification
+from .testing import make_user
+
+
+def cursor_of(link):
+    return parse_qs(urlparse(link).query)['cursor'][0]
+
+
+def encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode('ascii')
+
+
+class KeysetPaginationTests(APITestCase):
+    """Cursors walk a list forwards and back, and bad ones are a 404"""
+
+    def setUp(self):
+        self.user = make_user('alice')
+        self.client.force_authenticate(self.user)
+        Notification.objects.bulk_create(
+            Notification(user=self.user, notification_type='general', title=f'Note {index}', message='')
+            for index in range(25)
+        )
+        self.ids = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def page(self, cursor=None, path='/api/notifications/', **params):
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get(path, params)
+
+    def test_next_and_previous_round_trip(self):
+        first = self.page()
+        self.assertEqual([row['id'] for row in first.data['results']], self.ids[:20])
+        self.assertIsNone(first.data['previous'])
+
+        second = self.page(cursor_of(first.data['next']))
+        self.assertEqual([row['id'] for row in second.data['results']], self.ids[20:])
+        self.assertIsNone(second.data['next'])
+
+        back = self.page(cursor_of(second.data['previous']))
+        self.assertEqual([row['id'] for row in back.data['results']], self.ids[:20])
+        self.assertIsNone(back.data['previous'])
+        self.assertEqual(cursor_of(back.data['next']), cursor_of(first.data['next']))
+
+    def test_malformed_cursors_are_not_found(self):
+        for cursor in [
+            'not base64!',
+            encode(['x', 1]),
+            encode({'p': 'x'}),
+            encode({'p': [1]}),
+            encode({'p': ['x', 'y']}),
+            encode({'p': [1.5, 'y']}),
+            encode({'p': [[1], {'id': 2}]}),
+        ]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.page(cursor).status_code, 404)
+
+    def test_cursor_from_another_ordering_is_not_found(self):
+        for index in range(21):
+            make_user(f'smith{index}')
+        ranked = self.page(path='/api/auth/search/', q='smith')
+        self.assertIsNotNone(ranked.data['next'])
+
+        # Short queries are ordered by date instead of rank
+        response = self.page(cursor_of(ranked.data['next']), path='/api/auth/search/', q='sm')
+        self.assertEqual(response.status_code, 404)
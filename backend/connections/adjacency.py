@@ -0,0 +1,128 @@
+import time
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import caches
+from django.db.models import Q
+from .models import Connection
+
+ADJACENCY_CACHE_ALIAS = 'adjacency'
+
+# Status and direction share one byte per peer: status index * 2 + is_sender
+STATUSES = [status for status, _ in Connection.STATUS_CHOICES]
+
+
+def adjacency_cache_key(user_id, version):
+    return f'adjacency:{user_id}:{version}'
+
+
+def adjacency_version_key(user_id):
+    return f'adjacency-version:{user_id}'
+
+
+class Adjacency:
+    """
+    Every connection of one user, as three parallel arrays sorted by peer id.
+
+    Arrays pickle to a few bytes per peer, which keeps the cache entries of
+    well-connected users small; lookups are a binary search.
+    """
+
+    def __init__(self):
+        self.peers = array('q')
+        self.connection_ids = array('q')
+        self.flags = bytearray()
+
+    def __len__(self):
+        return len(self.peers)
+
+    def __contains__(self, peer_id):
+        return self.find(peer_id) is not None
+
+    def find(self, peer_id):
+        index = bisect_left(self.peers, peer_id)
+        if index < len(self.peers) and self.peers[index] == peer_id:
+            return index
+        return None
+
+    def get(self, peer_id):
+        """`(status, is_sender, connection_id)` for a peer, or None"""
+        index = self.find(peer_id)
+        if index is None:
+            return None
+        status, is_sender = divmod(self.flags[index], 2)
+        return STATUSES[status], bool(is_sender), self.connection_ids[index]
+
+    def set(self, peer_id, status, is_sender, connection_id):
+        flags = STATUSES.index(status) * 2 + int(is_sender)
+        index = bisect_left(self.peers, peer_id)
+        if index < len(self.peers) and self.peers[index] == peer_id:
+            self.connection_ids[index] = connection_id
+            self.flags[index] = flags
+        else:
+            self.peers.insert(index, peer_id)
+            self.connection_ids.insert(index, connection_id)
+            self.flags.insert(index, flags)
+
+
+class AdjacencyCache:
+    """
+    Per-user adjacency lists kept in the `adjacency` cache.
+
+    An entry is built from one query the first time a user is looked up
+    and stored under the user's current version, which lives in the same
+    cache; a warm lookup runs no SQL. Writes call `changed()` once they
+    commit (`connections.signals` for saves and deletes, the views for
+    bulk writes), which increments the versions of both users so every
+    process sharing the cache reads a new key and rebuilds the entry.
+    """
+
+    @property
+    def cache(self):
+        return caches[ADJACENCY_CACHE_ALIAS]
+
+    def load(self, user_id):
+        adjacency = Adjacency()
+        # Oldest first, so the newest connection wins when both directions exist
+        connections = Connection.objects.filter(
+            Q(sender_id=user_id) | Q(receiver_id=user_id)
+        ).order_by('created_at', 'id').values_list('id', 'sender_id', 'receiver_id', 'status')
+        for connection_id, sender_id, receiver_id, status in connections:
+            is_sender = sender_id == user_id
+            adjacency.set(receiver_id if is_sender else sender_id, status, is_sender, connection_id)
+        return adjacency
+
+    def version(self, user_id):
+        key = adjacency_version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            # A version that was evicted restarts from the clock, so it can
+            # never name an entry built before it was lost
+            version = time.time_ns()
+            self.cache.add(key, version, timeout=None)
+            version = self.cache.get(key, version)
+        return version
+
+    def get(self, user_id):
+        key = adjacency_cache_key(user_id, self.version(user_id))
+        adjacency = self.cache.get(key)
+        if adjacency is None:
+            adjacency = self.load(user_id)
+            self.cache.set(key, adjacency)
+        return adjacency
+
+    def lookup(self, user_id, peer_id):
+        """`(status, is_sender, connection_id)` between two users, or None"""
+        return self.get(user_id).get(peer_id)
+
+    def changed(self, *user_ids):
+        """Retire the entries of users whose connections changed; call after commit"""
+        for user_id in set(user_ids):
+            try:
+                self.cache.incr(adjacency_version_key(user_id))
+            except ValueError:
+                # Not read since it was evicted; the next read starts afresh
+                pass
+
+
+adjacency_cache = AdjacencyCache()
@@ -0,0 +1,156 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+from .models import Connection, ConnectionCounter
+from .suggestions import chunked
+
+COUNTER_FIELDS = ['accepted', 'pending_received', 'pending_sent']
+ZERO_COUNTS = dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def counter_field(connection_status, is_sender):
+    """The counter a connection in this status adds to for one side, or None"""
+    if connection_status == 'accepted':
+        return 'accepted'
+    if connection_status == 'pending':
+        return 'pending_sent' if is_sender else 'pending_received'
+    return None
+
+
+def apply_deltas(changes, user_ids):
+    """
+    Add each user's `changes` to their counter row and advance its version,
+    in one UPDATE; returns rows changed.
+    """
+    values = {'version': F('version') + 1}
+    for field in COUNTER_FIELDS:
+        by_delta = defaultdict(list)
+        for user_id in user_ids:
+            if changes[user_id][field]:
+                by_delta[changes[user_id][field]].append(user_id)
+        if by_delta:
+            delta = Case(
+                *(When(user_id__in=ids, then=Value(delta)) for delta, ids in by_delta.items()),
+                default=Value(0)
+            )
+            # Counters that drifted (see repair_connection_counters) stop
+            # at zero instead of failing the user's request
+            values[field] = Greatest(F(field) + delta, Value(0))
+    return ConnectionCounter.objects.filter(user_id__in=user_ids).update(**values)
+
+
+def update_counters(changes, user_ids):
+    """
+    Apply `changes` ({user_id: Counter of field deltas}) to the users' rows.
+    
+    All users are updated with one statement per chunk; users who have no
+    row yet get an empty one, and the same update is then applied to those.
+    """
+    missing = []
+    for chunk in chunked(user_ids):
+        updated = apply_deltas(changes, chunk)
+        if updated == 0:
+            missing.extend(chunk)
+        elif updated < len(chunk):
+            existing = set(ConnectionCounter.objects.filter(user_id__in=chunk).values_list('user_id', flat=True))
+            missing.extend(user_id for user_id in chunk if user_id not in existing)
+    if not missing:
+        return
+    
+    # A row another transaction inserted in the meantime is kept, and this
+    # change is added to it like to any other
+    ConnectionCounter.objects.bulk_create(
+        [ConnectionCounter(user_id=user_id) for user_id in missing],
+        ignore_conflicts=True
+    )
+    for chunk in chunked(missing):
+        apply_deltas(changes, chunk)
+
+
+def record_transitions(transitions):
+    """
+    Apply connection changes to both users' counters.
+    
+    `transitions` are `(sender_id, receiver_id, old_status, new_status)`,
+    with None for the status before a create or after a delete. Call this
+    inside the transaction that writes the connections, so the counts
+    commit or roll back with them. Every user involved gets a new version,
+    even when their counts net out, since their list has still changed.
+    """
+    changes = defaultdict(Counter)
+    for sender_id, receiver_id, old_status, new_status in transitions:
+        for user_id, is_sender in ((sender_id, True), (receiver_id, False)):
+            deltas = changes[user_id]
+            old_field = counter_field(old_status, is_sender)
+            new_field = counter_field(new_status, is_sender)
+            if old_field:
+                deltas[old_field] -= 1
+            if new_field:
+                deltas[new_field] += 1
+    update_counters(changes, list(changes))
+
+
+def touch_counters(user_ids):
+    """Advance the version of each user's counters without changing the counts"""
+    update_counters(defaultdict(Counter), list(user_ids))
+
+
+def count_connections(user_ids):
+    """`{user_id: {field: count}}` computed from the connections table"""
+    counts = {user_id: dict(ZERO_COUNTS) for user_id in user_ids}
+    for chunk in chunked(user_ids):
+        for side, is_sender in (('sender_id', True), ('receiver_id', False)):
+            totals = Connection.objects.filter(
+                **{f'{side}__in': chunk}
+            ).exclude(status='rejected').values_list(side, 'status').annotate(total=Count('id')).order_by()
+            for user_id, connection_status, total in totals:
+                counts[user_id][counter_field(connection_status, is_sender)] += total
+    return counts
+
+
+def recount(user_ids):
+    """
+    Recompute the counters of the given users; returns how many changed.
+
+    Rows that already hold the right counts are not rewritten; the others
+    also get a new version, so lists cached against the old one refresh.
+    """
+    changed = 0
+    for chunk in chunked(user_ids):
+        counts = count_connections(chunk)
+        stored = {
+            counter.user_id: {field: getattr(counter, field) for field in COUNTER_FIELDS}
+            for counter in ConnectionCounter.objects.filter(user_id__in=chunk)
+        }
+        # A missing row reads as zeros, so users without connections need none
+        counters = [
+            ConnectionCounter(user_id=user_id, **values)
+            for user_id, values in counts.items()
+            if stored.get(user_id, ZERO_COUNTS) != values
+        ]
+        ConnectionCounter.objects.bulk_create(
+            counters,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=COUNTER_FIELDS
+        )
+        if counters:
+            ConnectionCounter.objects.filter(
+                user_id__in=[counter.user_id for counter in counters]
+            ).update(version=F('version') + 1)
+        changed += len(counters)
+    return changed
+
+
+def counter_counts(counter):
+    """A ConnectionCounter as a dict; None (no row yet) reads as no connections"""
+    if counter is None:
+        return dict(ZERO_COUNTS)
+    return {field: getattr(counter, field) for field in COUNTER_FIELDS}
+
+
+def load_counts(user_id):
+    """A user's counters as a dict; users without a row have no connections"""
+    counts = ConnectionCounter.objects.filter(user_id=user_id).values(*COUNTER_FIELDS).first()
+    return counts or dict(ZERO_COUNTS)
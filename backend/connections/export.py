@@ -0,0 +1,89 @@
+import csv
+import json
+import zlib
+
+from .models import Connection
+
+EXPORT_FIELDS = ['id', 'sender_id', 'receiver_id', 'status', 'created_at', 'updated_at']
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+# Rows fetched per round trip, and bytes per chunk handed to the server
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+
+def format_datetime(value):
+    """ISO 8601 like the API's other responses, with Z for UTC"""
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def export_rows(status=None):
+    """
+    Every connection as a tuple of EXPORT_FIELDS, in id order.
+
+    Rows are streamed with `iterator()`: a server-side cursor where the
+    backend has one, `fetchmany()` batches otherwise. No model instances
+    are built and nothing is cached on the queryset.
+    """
+    connections = Connection.objects.order_by('id')
+    if status:
+        connections = connections.filter(status=status)
+    for row in connections.values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE):
+        yield (*row[:4], format_datetime(row[4]), format_datetime(row[5]))
+
+
+class LineBuffer:
+    """Write target for csv.writer that hands back what was written"""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), separators=(',', ':')) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    """Join lines into byte chunks of about `size`, rather than one per edge"""
+    chunk = []
+    length = 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(chunk).encode()
+            chunk = []
+            length = 0
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+def gzipped(chunks):
+    """Compress a stream of byte chunks into one gzip member"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(export_format, status=None, compress=False):
+    """The export as an iterator of byte chunks"""
+    lines = ndjson_lines if export_format == 'ndjson' else csv_lines
+    chunks = buffered(lines(export_rows(status)))
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,35 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from connections.counters import recount
+from connections.suggestions import QUERY_CHUNK, chunked
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recompute every user\'s denormalized connection counters from the connections table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=QUERY_CHUNK, help='Users recounted per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = min(options['batch_size'], QUERY_CHUNK)
+        started = time.monotonic()
+        checked = repaired = 0
+
+        # Writes that bypass connections.counters (the admin, bulk loads,
+        # deleted users) leave counters stale until this runs
+        user_ids = User.objects.order_by('id').values_list('id', flat=True)
+        for batch in chunked(user_ids.iterator(chunk_size=batch_size), batch_size):
+            with transaction.atomic():
+                repaired += recount(batch)
+            checked += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Repaired {repaired} of {checked} connection counters in {time.monotonic() - started:.1f}s'
+            )
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="connection",
+            index=models.Index(
+                fields=["sender", "-created_at"], name="connections_sender__efe016_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="connection",
+            index=models.Index(
+                fields=["receiver", "-created_at"], name="connections_receive_68eb73_idx"
+            ),
+        ),
+    ]
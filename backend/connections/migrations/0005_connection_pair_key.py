@@ -0,0 +1,90 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:58
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest, Least
+
+
+def fill_pair_keys(apps, schema_editor):
+    Connection = apps.get_model("connections", "Connection")
+    Notification = apps.get_model("notifications", "Notification")
+
+    Connection.objects.update(
+        low_id=Least("sender_id", "receiver_id"),
+        high_id=Greatest("sender_id", "receiver_id"),
+    )
+
+    # A->B and B->A may both exist from before the constraint; keep an
+    # accepted one if there is one, else the newest, moving the
+    # notifications of the others onto it
+    duplicates = (
+        Connection.objects.values("low_id", "high_id")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+    )
+    for pair in duplicates:
+        connections = list(
+            Connection.objects.filter(
+                low_id=pair["low_id"], high_id=pair["high_id"]
+            ).order_by(
+                Case(When(status="accepted", then=Value(0)), default=Value(1)),
+                "-created_at",
+                "-id",
+            )
+        )
+        kept, extra = connections[0], [connection.id for connection in connections[1:]]
+        Notification.objects.filter(connection_id__in=extra).update(connection=kept)
+        Connection.objects.filter(id__in=extra).delete()
+
+    # Self-connections were never valid (Connection.clean rejects them)
+    Connection.objects.filter(low_id=F("high_id")).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0004_connection_suggestions"),
+        ("notifications", "0003_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="connection",
+            name="low_id",
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="connection",
+            name="high_id",
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_pair_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="connection",
+            name="low_id",
+            field=models.BigIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name="connection",
+            name="high_id",
+            field=models.BigIntegerField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="connection",
+            constraint=models.UniqueConstraint(
+                fields=("low_id", "high_id"), name="connections_unique_pair"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="connection",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("low_id__lt", models.F("high_id"))),
+                name="connections_not_self",
+            ),
+        ),
+        # The pair key covers both directions; sender/receiver is redundant
+        migrations.AlterUniqueTogether(
+            name="connection",
+            unique_together=set(),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:56
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Connection = apps.get_model("connections", "Connection")
+    ConnectionCounter = apps.get_model("connections", "ConnectionCounter")
+
+    counts = defaultdict(lambda: {"accepted": 0, "pending_received": 0, "pending_sent": 0})
+    totals = (
+        Connection.objects.exclude(status="rejected")
+        .values_list("sender_id", "receiver_id", "status")
+        .iterator(chunk_size=2000)
+    )
+    for sender_id, receiver_id, status in totals:
+        if status == "accepted":
+            counts[sender_id]["accepted"] += 1
+            counts[receiver_id]["accepted"] += 1
+        else:
+            counts[sender_id]["pending_sent"] += 1
+            counts[receiver_id]["pending_received"] += 1
+
+    ConnectionCounter.objects.bulk_create(
+        [ConnectionCounter(user_id=user_id, **values) for user_id, values in counts.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0005_connection_pair_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConnectionCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="connection_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("accepted", models.PositiveIntegerField(default=0)),
+                ("pending_received", models.PositiveIntegerField(default=0)),
+                ("pending_sent", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "connection_counters",
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
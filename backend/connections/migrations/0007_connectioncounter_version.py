@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0006_connection_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="connectioncounter",
+            name="version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -23,17 +23,27 @@ class Connection(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     message = models.TextField(blank=True, null=True, max_length=500)
     
+    # The user ids in ascending order, whichever side sent the request, so
+    # that one unique index covers both directions (see pair_key)
+    low_id = models.BigIntegerField(editable=False)
+    high_id = models.BigIntegerField(editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'connections'
-        unique_together = ['sender', 'receiver']
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['low_id', 'high_id'], name='connections_unique_pair'),
+            models.CheckConstraint(condition=models.Q(low_id__lt=models.F('high_id')), name='connections_not_self'),
+        ]
         indexes = [
             models.Index(fields=['sender', 'status']),
             models.Index(fields=['receiver', 'status']),
+            models.Index(fields=['sender', '-created_at']),
+            models.Index(fields=['receiver', '-created_at']),
         ]
     
     def clean(self):
@@ -42,9 +52,75 @@ class Connection(models.Model):
         if self.sender == self.receiver:
             raise ValidationError("Users cannot send connection requests to themselves.")
     
+    @staticmethod
+    def pair_key(user_id, other_user_id):
+        """The (low_id, high_id) values of a connection between two users"""
+        return min(user_id, other_user_id), max(user_id, other_user_id)
+    
+    @classmethod
+    def build(cls, sender_id, receiver_id, **fields):
+        """An unsaved connection with its pair key set, for bulk_create()"""
+        low_id, high_id = cls.pair_key(sender_id, receiver_id)
+        return cls(sender_id=sender_id, receiver_id=receiver_id, low_id=low_id, high_id=high_id, **fields)
+    
     def save(self, *args, **kwargs):
         self.clean()
+        self.low_id, self.high_id = self.pair_key(self.sender_id, self.receiver_id)
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.sender.full_name} -> {self.receiver.full_name} ({self.status})"
+
+class ConnectionSuggestion(models.Model):
+    """Precomputed "people you may know" candidate for a user"""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='connection_suggestions'
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    mutual_count = models.PositiveIntegerField(default=0)
+    shared_company = models.BooleanField(default=False)
+    shared_industry = models.BooleanField(default=False)
+    score = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'connection_suggestions'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'candidate'], name='connection_suggestions_unique_pair'),
+        ]
+        indexes = [
+            # Serving reads a user's best candidates straight off this index
+            models.Index(fields=['user', '-score', 'candidate'], name='connection_sugg_user_score'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} -> {self.candidate_id} ({self.score})"
+
+class ConnectionCounter(models.Model):
+    """Denormalized connection counts of one user (see connections.counters)"""
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='connection_counter'
+    )
+    accepted = models.PositiveIntegerField(default=0)
+    pending_received = models.PositiveIntegerField(default=0)
+    pending_sent = models.PositiveIntegerField(default=0)
+    # Advanced by every change to what the user's connection list shows,
+    # so the list's ETag needs no aggregate over the connections
+    version = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'connection_counters'
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.accepted} accepted, {self.pending_received} in, {self.pending_sent} out"
@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from django.db import models
 from django.contrib.auth import get_user_model
-from .models import Connection
+from django.db import IntegrityError, transaction
+from .counters import record_transitions
+from .models import Connection, ConnectionSuggestion
+from backend.serializers import EagerLoadingMixin
 from users.serializers import UserSearchSerializer
 
 User = get_user_model()
@@ -18,53 +20,69 @@ class ConnectionRequestSerializer(serializers.ModelSerializer):
         """Ensure user exists and user cannot send request to themselves"""
         request = self.context.get('request')
         
-        # Check if user exists by username
-        try:
-            user = User.objects.get(username=value)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("User with this username does not exist.")
-        
         # Ensure user cannot send request to themselves
         if request and request.user.username == value:
             raise serializers.ValidationError("You cannot send a connection request to yourself.")
         
-        return value
-    
-    def validate(self, attrs):
-        """Check if connection already exists"""
-        request = self.context.get('request')
-        receiver_username = attrs.get('receiver')
-        
-        if request:
-            # Get the receiver user object by username
-            receiver = User.objects.get(username=receiver_username)
-            
-            # Check if connection already exists in either direction
-            existing_connection = Connection.objects.filter(
-                models.Q(sender=request.user, receiver=receiver) |
-                models.Q(sender=receiver, receiver=request.user)
-            ).first()
-            
-            if existing_connection:
-                raise serializers.ValidationError("Connection already exists between these users.")
-        
-        return attrs
+        # The receiver is looked up once and carried through to create()
+        try:
+            return User.objects.get(username=value)
+        except User.DoesNotExist:
+            raise serializers.ValidationError("User with this username does not exist.")
     
     def create(self, validated_data):
         """Create connection request"""
         request = self.context.get('request')
-        receiver_username = validated_data.pop('receiver')
-        receiver = User.objects.get(username=receiver_username)
+        validated_data.setdefault('sender', request.user)
         
-        validated_data['sender'] = request.user
-        validated_data['receiver'] = receiver
-        return super().create(validated_data)
+        # The unique (low_id, high_id) index rejects a connection in either
+        # direction, so there is no separate existence check to race with
+        try:
+            with transaction.atomic():
+                connection = super().create(validated_data)
+                record_transitions([(connection.sender_id, connection.receiver_id, None, connection.status)])
+                return connection
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'non_field_errors': ["Connection already exists between these users."]
+            })
 
+class ConnectionBulkRequestSerializer(serializers.Serializer):
+    """Serializer for sending connection requests to many users at once"""
+    MAX_RECEIVERS = 100
+    
+    receivers = serializers.ListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+        max_length=MAX_RECEIVERS
+    )
+    message = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+    
 class ConnectionResponseSerializer(serializers.Serializer):
     """Serializer for responding to connection requests"""
     action = serializers.ChoiceField(choices=['accept', 'reject'])
     
-class ConnectionListSerializer(serializers.ModelSerializer):
+class ConnectionBulkResponseSerializer(ConnectionResponseSerializer):
+    """Serializer for responding to many connection requests at once"""
+    MAX_CONNECTION_IDS = 500
+    
+    connection_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_CONNECTION_IDS
+    )
+    
+class ConnectionStatusBatchSerializer(serializers.Serializer):
+    """Serializer for checking connection status with many users at once"""
+    MAX_USER_IDS = 500
+    
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_USER_IDS
+    )
+    
+class ConnectionListSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for listing connections"""
     sender = UserSearchSerializer(read_only=True)
     receiver = UserSearchSerializer(read_only=True)
@@ -72,3 +90,11 @@ class ConnectionListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Connection
         fields = ['id', 'sender', 'receiver', 'status', 'message', 'created_at', 'updated_at']
+
+class ConnectionSuggestionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for "people you may know" suggestions"""
+    candidate = UserSearchSerializer(read_only=True)
+    
+    class Meta:
+        model = ConnectionSuggestion
+        fields = ['candidate', 'mutual_count', 'shared_company', 'shared_industry', 'score']
@@ -0,0 +1,53 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from users.serializers import UserSearchSerializer
+from .adjacency import adjacency_cache
+from .counters import touch_counters
+from .models import Connection
+from .tasks import update_connection_suggestions
+
+User = get_user_model()
+
+@receiver(post_save, sender=Connection)
+@receiver(post_delete, sender=Connection)
+def retire_cached_adjacency(sender, instance, **kwargs):
+    """Both users' cached adjacency is rebuilt once the change is committed"""
+    transaction.on_commit(partial(adjacency_cache.changed, instance.sender_id, instance.receiver_id))
+
+@receiver(post_save, sender=Connection)
+def queue_suggestion_update(sender, instance, created=False, **kwargs):
+    """New requests drop the pair from suggestions, accepted ones add mutuals"""
+    if created or instance.status == 'accepted':
+        transaction.on_commit(partial(update_connection_suggestions.delay, instance.id))
+
+def listing_user_ids(user_id):
+    """Users whose connection list shows `user_id`, themselves included"""
+    pairs = Connection.objects.filter(
+        Q(sender_id=user_id) | Q(receiver_id=user_id)
+    ).values_list('sender_id', 'receiver_id')
+    return {pair_user_id for pair in pairs for pair_user_id in pair}
+
+@receiver(post_save, sender=User)
+def touch_counters_on_profile_edit(sender, instance, created=False, update_fields=None, **kwargs):
+    """Connection lists that show this user pick up their edits"""
+    # Nobody lists a new user yet, and saves like last_login touch nothing shown
+    if created or (update_fields and not set(update_fields) & set(UserSearchSerializer.Meta.fields)):
+        return
+    user_ids = listing_user_ids(instance.pk)
+    if user_ids:
+        touch_counters(user_ids)
+
+@receiver(pre_delete, sender=User)
+def touch_counters_on_user_delete(sender, instance, **kwargs):
+    """Connection lists that show this user drop them once they are deleted"""
+    # Read before the cascade removes the connections, bumped only after it
+    # commits so no one pairs the new version with the old rows. The user's
+    # own row goes with them
+    user_ids = listing_user_ids(instance.pk) - {instance.pk}
+    if user_ids:
+        transaction.on_commit(partial(touch_counters, user_ids))
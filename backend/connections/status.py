@@ -0,0 +1,32 @@
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from .models import Connection
+
+
+def annotate_connection_status(queryset, user):
+    """
+    Annotate a User queryset with each user's relationship to `user`.
+    
+    Adds `connection_status` (none, pending-sent, pending-received,
+    accepted or rejected) and `connection_id` as correlated subqueries,
+    so they come back in the same query as the users themselves. Like
+    connection_status, the newest connection wins if requests were sent
+    in both directions.
+    """
+    connections = Connection.objects.filter(
+        Q(sender=user, receiver=OuterRef('pk')) |
+        Q(sender=OuterRef('pk'), receiver=user)
+    ).order_by('-created_at', '-id')
+    
+    relation = connections.annotate(
+        relation=Case(
+            When(status='pending', sender=user, then=Value('pending-sent')),
+            When(status='pending', then=Value('pending-received')),
+            default=F('status')
+        )
+    ).values('relation')[:1]
+    
+    return queryset.annotate(
+        connection_status=Coalesce(Subquery(relation), Value('none')),
+        connection_id=Subquery(connections.values('id')[:1])
+    )
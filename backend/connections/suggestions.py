@@ -0,0 +1,285 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from .models import Connection, ConnectionSuggestion
+
+User = get_user_model()
+
+# Keep `__in` lookups well under SQLite's bound parameter limit
+QUERY_CHUNK = 500
+
+
+def get_suggestion_settings():
+    return {
+        'MUTUAL_WEIGHT': 10,
+        'COMPANY_WEIGHT': 5,
+        'INDUSTRY_WEIGHT': 2,
+        'MAX_PER_USER': 20,
+        'MAX_FANOUT': 200,
+        'COLLEAGUES_PER_COMPANY': 20,
+        'BATCH_SIZE': 500,
+        **getattr(settings, 'CONNECTION_SUGGESTIONS', {}),
+    }
+
+
+def chunked(values, size=QUERY_CHUNK):
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def load_connections(user_ids):
+    """All peers and accepted peers (friends) of the given users"""
+    peers = defaultdict(set)
+    friends = defaultdict(set)
+    for chunk in chunked(user_ids):
+        connections = Connection.objects.filter(
+            Q(sender_id__in=chunk) | Q(receiver_id__in=chunk)
+        ).values_list('sender_id', 'receiver_id', 'status')
+        for sender_id, receiver_id, status in connections:
+            peers[sender_id].add(receiver_id)
+            peers[receiver_id].add(sender_id)
+            if status == 'accepted':
+                friends[sender_id].add(receiver_id)
+                friends[receiver_id].add(sender_id)
+    return peers, friends
+
+
+def load_friends(user_ids):
+    """Accepted peers of the given users"""
+    friends = defaultdict(set)
+    for chunk in chunked(user_ids):
+        connections = Connection.objects.filter(
+            Q(sender_id__in=chunk) | Q(receiver_id__in=chunk),
+            status='accepted'
+        ).values_list('sender_id', 'receiver_id')
+        for sender_id, receiver_id in connections:
+            friends[sender_id].add(receiver_id)
+            friends[receiver_id].add(sender_id)
+    return friends
+
+
+def count_friends(user_ids):
+    """Number of accepted connections of each of the given users"""
+    counts = Counter()
+    for chunk in chunked(user_ids):
+        for side in ('sender_id', 'receiver_id'):
+            totals = Connection.objects.filter(
+                **{f'{side}__in': chunk},
+                status='accepted'
+            ).values_list(side).annotate(total=Count('id')).order_by()
+            counts.update(dict(totals))
+    return counts
+
+
+def load_profiles(user_ids):
+    """`(company, industry)` of the given active users"""
+    profiles = {}
+    for chunk in chunked(user_ids):
+        users = User.objects.filter(id__in=chunk, is_active=True).values_list('id', 'company', 'industry')
+        for user_id, company, industry in users:
+            profiles[user_id] = (company.strip().lower(), industry.strip().lower())
+    return profiles
+
+
+def load_colleagues():
+    """The most recently joined active users of every company"""
+    limit = get_suggestion_settings()['COLLEAGUES_PER_COMPANY']
+    colleagues = defaultdict(list)
+    if not limit:
+        return colleagues
+    users = User.objects.filter(is_active=True).annotate(
+        company_rank=Window(RowNumber(), partition_by=F('company'), order_by=F('id').desc())
+    ).filter(company_rank__lte=limit).values_list('id', 'company')
+    for user_id, company in users.iterator(chunk_size=2000):
+        colleagues[company.strip().lower()].append(user_id)
+    return colleagues
+
+
+def score_candidate(user_profile, candidate_profile, mutual_count, weights):
+    """`(score, shared_company, shared_industry)` for a candidate"""
+    company, industry = user_profile
+    candidate_company, candidate_industry = candidate_profile
+    shared_company = bool(company) and company == candidate_company
+    shared_industry = bool(industry) and industry == candidate_industry
+    score = (
+        mutual_count * weights['MUTUAL_WEIGHT'] +
+        shared_company * weights['COMPANY_WEIGHT'] +
+        shared_industry * weights['INDUSTRY_WEIGHT']
+    )
+    return score, shared_company, shared_industry
+
+
+def build_suggestion(user_id, candidate_id, mutual_count, profiles, weights):
+    """An unsaved ConnectionSuggestion scored for the pair, or None"""
+    if user_id not in profiles or candidate_id not in profiles:
+        return None
+    score, shared_company, shared_industry = score_candidate(
+        profiles[user_id], profiles[candidate_id], mutual_count, weights
+    )
+    return ConnectionSuggestion(
+        user_id=user_id,
+        candidate_id=candidate_id,
+        mutual_count=mutual_count,
+        shared_company=shared_company,
+        shared_industry=shared_industry,
+        score=score
+    )
+
+
+def rebuild_suggestions(batch_size=None):
+    """
+    Recompute every user's suggestions from the connection graph.
+
+    Users are processed in batches: one pass loads the batch's connections,
+    a second the accepted connections of their friends, and friends of
+    friends are counted in memory. Friends with more than MAX_FANOUT
+    accepted connections are not expanded, since they would suggest
+    thousands of strangers. Colleagues from the same company are added
+    as candidates even without mutual connections. Each batch's rows are
+    replaced in one transaction. Returns the number of rows written.
+    """
+    config = get_suggestion_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    colleagues = load_colleagues()
+    written = 0
+
+    user_ids = User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+    for batch in chunked(user_ids.iterator(chunk_size=batch_size), batch_size):
+        peers, friends = load_connections(batch)
+        friend_ids = set().union(*(friends[user_id] for user_id in batch))
+        friends_of_friends = load_friends(friend_ids)
+        profiles = load_profiles(batch)
+
+        candidates = {}
+        for user_id in batch:
+            if user_id not in profiles:
+                continue
+            excluded = peers[user_id] | {user_id}
+            mutual = Counter()
+            for friend_id in friends[user_id]:
+                if len(friends_of_friends[friend_id]) <= config['MAX_FANOUT']:
+                    mutual.update(friends_of_friends[friend_id] - excluded)
+            for colleague_id in colleagues.get(profiles[user_id][0], []):
+                if colleague_id not in excluded:
+                    mutual.setdefault(colleague_id, 0)
+            candidates[user_id] = mutual
+
+        profiles.update(load_profiles(
+            set().union(*candidates.values()) - profiles.keys()
+        ))
+        suggestions = []
+        for user_id, mutual in candidates.items():
+            # Rank plain tuples; only the kept candidates become model instances
+            best = heapq.nsmallest(config['MAX_PER_USER'], (
+                (-score_candidate(profiles[user_id], profiles[candidate_id], mutual_count, config)[0], candidate_id)
+                for candidate_id, mutual_count in mutual.items()
+                if candidate_id in profiles
+            ))
+            suggestions.extend(
+                build_suggestion(user_id, candidate_id, mutual[candidate_id], profiles, config)
+                for _, candidate_id in best
+            )
+
+        with transaction.atomic():
+            ConnectionSuggestion.objects.filter(user_id__in=batch).delete()
+            ConnectionSuggestion.objects.bulk_create(suggestions, batch_size=QUERY_CHUNK)
+        written += len(suggestions)
+    return written
+
+
+def update_suggestions(connection_id):
+    """
+    Apply one connection change to the precomputed suggestions.
+
+    Whatever its status, a connection means the pair can no longer be
+    suggested to each other. Once accepted, each side's friends become
+    candidates for the other; their mutual counts are recomputed exactly
+    (not incremented), so replaying an update is harmless. As in the
+    rebuild, friends with more than MAX_FANOUT accepted connections are
+    neither expanded nor counted as mutuals. Per-user MAX_PER_USER
+    trimming is left to the next rebuild.
+    """
+    connection = Connection.objects.filter(id=connection_id).values_list(
+        'sender_id', 'receiver_id', 'status'
+    ).first()
+    if connection is None:
+        return 0
+    sender_id, receiver_id, status = connection
+
+    ConnectionSuggestion.objects.filter(
+        Q(user_id=sender_id, candidate_id=receiver_id) |
+        Q(user_id=receiver_id, candidate_id=sender_id)
+    ).delete()
+    if status != 'accepted':
+        return 0
+
+    config = get_suggestion_settings()
+    peers, friends = load_connections([sender_id, receiver_id])
+    pairs = []
+    for user_id, other_id in ((sender_id, receiver_id), (receiver_id, sender_id)):
+        if len(friends[other_id]) > config['MAX_FANOUT']:
+            continue
+        pairs.extend(
+            (user_id, candidate_id)
+            for candidate_id in friends[other_id] - peers[user_id] - {user_id}
+        )
+    if not pairs:
+        return 0
+
+    candidate_ids = {candidate_id for _, candidate_id in pairs}
+    candidate_friends = load_friends(candidate_ids)
+    profiles = load_profiles(candidate_ids | {sender_id, receiver_id})
+    mutual_ids = set().union(*(
+        friends[user_id] & candidate_friends[candidate_id] for user_id, candidate_id in pairs
+    ))
+    fanout = count_friends(mutual_ids)
+
+    suggestions = []
+    for user_id, candidate_id in pairs:
+        mutual_count = sum(
+            1 for friend_id in friends[user_id] & candidate_friends[candidate_id]
+            if fanout[friend_id] <= config['MAX_FANOUT']
+        )
+        # Both directions: the new friend's friends now share a mutual with user_id
+        for pair in ((user_id, candidate_id), (candidate_id, user_id)):
+            suggestion = build_suggestion(*pair, mutual_count, profiles, config)
+            if suggestion:
+                suggestions.append(suggestion)
+
+    ConnectionSuggestion.objects.bulk_create(
+        suggestions,
+        batch_size=QUERY_CHUNK,
+        update_conflicts=True,
+        unique_fields=['user', 'candidate'],
+        update_fields=['mutual_count', 'shared_company', 'shared_industry', 'score', 'updated_at']
+    )
+    return len(suggestions)
+
+
+def update_many_suggestions(connection_ids):
+    """
+    `update_suggestions()` for connections written in bulk.
+
+    The pairs of all connections are dropped in one statement; only the
+    accepted ones go on to the per-connection mutual count update.
+    """
+    connections = list(Connection.objects.filter(id__in=connection_ids).values_list(
+        'id', 'sender_id', 'receiver_id', 'status'
+    ))
+    for chunk in chunked(connections, QUERY_CHUNK // 4):
+        pairs = Q()
+        for _, sender_id, receiver_id, _ in chunk:
+            pairs |= Q(user_id=sender_id, candidate_id=receiver_id) | Q(user_id=receiver_id, candidate_id=sender_id)
+        ConnectionSuggestion.objects.filter(pairs).delete()
+    return sum(
+        update_suggestions(connection_id)
+        for connection_id, _, _, status in connections
+        if status == 'accepted'
+    )
@@ -0,0 +1,23 @@
+from celery import shared_task
+from .suggestions import rebuild_suggestions, update_many_suggestions, update_suggestions
+
+@shared_task
+def update_connection_suggestions(connection_id):
+    """Fold a new or accepted connection into the precomputed suggestions"""
+    written = update_suggestions(connection_id)
+    
+    return f"Updated {written} suggestions for connection {connection_id}"
+
+@shared_task
+def update_bulk_connection_suggestions(connection_ids):
+    """Fold connections written in bulk (without signals) into the suggestions"""
+    written = update_many_suggestions(connection_ids)
+    
+    return f"Updated {written} suggestions for {len(connection_ids)} connections"
+
+@shared_task(soft_time_limit=25 * 60)
+def rebuild_connection_suggestions(batch_size=None):
+    """Recompute "people you may know" for every user"""
+    written = rebuild_suggestions(batch_size=batch_size)
+    
+    return f"Rebuilt {written} connection suggestions"
@@ -1,3 +1,273 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from backend.testing import QueryBudgetTestCase, make_user
+from .counters import count_connections, load_counts, recount
+from .models import Connection, ConnectionSuggestion
+from .suggestions import rebuild_suggestions, update_suggestions
 
-# Create your tests here.
+User = get_user_model()
+
+
+def connect(sender, receiver, status='accepted'):
+    return Connection.objects.create(sender=sender, receiver=receiver, status=status)
+
+
+@override_settings(CONNECTION_SUGGESTIONS={'MAX_FANOUT': 3, 'COLLEAGUES_PER_COMPANY': 0})
+class SuggestionUpdateTests(TestCase):
+    """The incremental update scores a pair exactly like the rebuild"""
+
+    def setUp(self):
+        self.user = make_user('user')
+        self.candidate = make_user('candidate')
+        self.new_friend = make_user('newfriend')
+        self.friends = [make_user(f'friend{index}') for index in range(2)]
+        # A mutual friend with more than MAX_FANOUT friends is not counted
+        self.hub = make_user('hub')
+        for friend in [*self.friends, self.hub]:
+            connect(self.user, friend)
+            connect(self.candidate, friend)
+        for index in range(3):
+            connect(self.hub, make_user(f'hubfriend{index}'))
+        connect(self.candidate, self.new_friend)
+
+    def mutual_counts(self):
+        return dict(ConnectionSuggestion.objects.filter(
+            user__in=[self.user, self.candidate],
+            candidate__in=[self.user, self.candidate]
+        ).values_list('user_id', 'mutual_count'))
+
+    def test_accepted_connection_matches_rebuild(self):
+        connection = connect(self.user, self.new_friend)
+        ConnectionSuggestion.objects.all().delete()
+        update_suggestions(connection.id)
+        incremental = self.mutual_counts()
+
+        rebuild_suggestions()
+        self.assertEqual(incremental, self.mutual_counts())
+        self.assertEqual(incremental, {self.user.id: 3, self.candidate.id: 3})
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """Hot connection endpoints stay within their QUERY_BUDGET"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice', company='Acme', industry='Tech')
+        self.friends = [make_user(f'friend{index}', company='Acme') for index in range(3)]
+        self.senders = [make_user(f'sender{index}') for index in range(3)]
+        self.strangers = [make_user(f'stranger{index}', industry='Tech') for index in range(5)]
+        for index, friend in enumerate(self.friends):
+            connect(self.user, friend)
+            connect(friend, self.strangers[index])
+        self.requests = [connect(sender, self.user, status='pending') for sender in self.senders]
+        recount(User.objects.values_list('id', flat=True))
+        rebuild_suggestions()
+        self.authenticate(self.user)
+        self.clear_caches()
+
+    def test_bulk_request(self):
+        receivers = [user.username for user in self.strangers] + [self.friends[0].username, 'nobody']
+        response = self.client.post('/api/connections/request/bulk/', {'receivers': receivers}, format='json')
+        self.assertEqual(response.data['created'], 5)
+        self.assertWithinQueryBudget(response)
+
+    def test_list(self):
+        response = self.client.get('/api/connections/list/')
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertWithinQueryBudget(response)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        with self.assertMaxQueries(3) as first:
+            response = self.client.get('/api/connections/list/')
+        self.assertEqual(len(response.data['results']), 6)
+
+        for index in range(6):
+            connect(make_user(f'peer{index}'), self.user)
+        caches['auth_users'].clear()
+        with self.assertNumQueries(first.count):
+            response = self.client.get('/api/connections/list/')
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_bulk_respond(self):
+        connection_ids = [connection.id for connection in self.requests]
+        response = self.client.post(
+            '/api/connections/respond/', {'connection_ids': connection_ids, 'action': 'accept'}, format='json'
+        )
+        self.assertEqual(response.data['updated'], 3)
+        self.assertWithinQueryBudget(response)
+
+    def test_status(self):
+        response = self.client.get(f'/api/connections/status/{self.friends[0].id}/')
+        self.assertEqual(response.data['status'], 'accepted')
+        self.assertWithinQueryBudget(response)
+
+    def test_bulk_status(self):
+        user_ids = [user.id for user in self.friends + self.senders + self.strangers]
+        response = self.client.post('/api/connections/status/', {'user_ids': user_ids}, format='json')
+        self.assertEqual(len(response.data['results']), 11)
+        self.assertWithinQueryBudget(response)
+
+    def test_suggestions(self):
+        response = self.client.get('/api/connections/suggestions/')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertWithinQueryBudget(response)
+
+
+class ConnectionStatusTests(QueryBudgetTestCase):
+    """Status checks are answered from the cached adjacency and follow every change"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice')
+        self.peers = {name: make_user(name) for name in ('bob', 'carol', 'dave', 'erin')}
+        self.authenticate(self.user)
+        self.clear_caches()
+
+    def status(self, name):
+        return self.client.get(f'/api/connections/status/{self.peers[name].id}/').data['status']
+
+    def client_for(self, name):
+        return self.authenticate(self.peers[name], APIClient())
+
+    def test_warm_status_runs_no_queries(self):
+        self.status('bob')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.status('bob'), 'none')
+
+    def test_status_follows_request_and_answers(self):
+        self.assertEqual(self.status('bob'), 'none')
+        response = self.client.post('/api/connections/request/', {'receiver': 'bob'}, format='json')
+        self.assertEqual(self.status('bob'), 'pending')
+
+        self.client_for('bob').post(
+            f'/api/connections/respond/{response.data["id"]}/', {'action': 'reject'}, format='json'
+        )
+        self.assertEqual(self.status('bob'), 'rejected')
+
+        self.assertEqual(self.status('carol'), 'none')
+        response = self.client_for('carol').post('/api/connections/request/', {'receiver': 'alice'}, format='json')
+        self.assertEqual(self.status('carol'), 'pending')
+        self.client.post(f'/api/connections/respond/{response.data["id"]}/', {'action': 'accept'}, format='json')
+        self.assertEqual(self.status('carol'), 'accepted')
+
+    def test_status_follows_cancel(self):
+        response = self.client.post('/api/connections/request/', {'receiver': 'dave'}, format='json')
+        self.assertEqual(self.status('dave'), 'pending')
+        self.client.delete(f'/api/connections/cancel/{response.data["id"]}/')
+        self.assertEqual(self.status('dave'), 'none')
+
+    def test_status_follows_bulk_writes(self):
+        self.assertEqual(self.status('erin'), 'none')
+        self.client.post('/api/connections/request/bulk/', {'receivers': ['erin']}, format='json')
+        self.assertEqual(self.status('erin'), 'pending')
+
+        response = self.client_for('bob').post('/api/connections/request/', {'receiver': 'alice'}, format='json')
+        self.assertEqual(self.status('bob'), 'pending')
+        self.client.post(
+            '/api/connections/respond/', {'connection_ids': [response.data['id']], 'action': 'accept'}, format='json'
+        )
+        self.assertEqual(self.status('bob'), 'accepted')
+
+
+class ConnectionCounterTests(QueryBudgetTestCase):
+    """Every request path keeps the denormalized counters equal to a recount"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice')
+        self.peers = [make_user(f'peer{index}') for index in range(6)]
+        self.authenticate(self.user)
+
+    def assertCountersExact(self):
+        user_ids = [self.user.id, *(peer.id for peer in self.peers)]
+        self.assertEqual({user_id: load_counts(user_id) for user_id in user_ids}, count_connections(user_ids))
+
+    def request_from(self, peer):
+        client = self.authenticate(peer, APIClient())
+        return client.post('/api/connections/request/', {'receiver': 'alice'}, format='json').data['id']
+
+    def test_request_and_cancel(self):
+        response = self.client.post('/api/connections/request/', {'receiver': 'peer0'}, format='json')
+        self.assertCountersExact()
+        self.client.delete(f'/api/connections/cancel/{response.data["id"]}/')
+        self.assertCountersExact()
+
+    def test_bulk_request(self):
+        # peer0 already has a row, the others are seeded by the bulk request
+        self.request_from(self.peers[0])
+        receivers = [peer.username for peer in self.peers[1:]]
+        self.client.post('/api/connections/request/bulk/', {'receivers': receivers}, format='json')
+        self.assertCountersExact()
+
+    def test_respond(self):
+        accepted, rejected = self.request_from(self.peers[0]), self.request_from(self.peers[1])
+        self.client.post(f'/api/connections/respond/{accepted}/', {'action': 'accept'}, format='json')
+        self.client.post(f'/api/connections/respond/{rejected}/', {'action': 'reject'}, format='json')
+        self.assertCountersExact()
+
+    def test_bulk_respond(self):
+        connection_ids = [self.request_from(peer) for peer in self.peers]
+        for action, chunk in (('accept', connection_ids[:3]), ('reject', connection_ids[3:])):
+            self.client.post('/api/connections/respond/', {'connection_ids': chunk, 'action': action}, format='json')
+            self.assertCountersExact()
+
+
+class ConnectionListVersionTests(QueryBudgetTestCase):
+    """The list's ETag changes with every write that changes the list"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice')
+        self.peer = make_user('bob')
+        self.authenticate(self.user)
+
+    def assertListChanges(self, change):
+        etag = self.client.get('/api/connections/list/')['ETag']
+        self.assertEqual(self.client.get('/api/connections/list/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get('/api/connections/list/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def request(self):
+        self.connection_id = self.client.post('/api/connections/request/', {'receiver': 'bob'}, format='json').data['id']
+
+    def test_request_answer_and_cancel(self):
+        self.assertListChanges(self.request)
+        self.assertListChanges(lambda: self.client.delete(f'/api/connections/cancel/{self.connection_id}/'))
+        self.request()
+        client = self.authenticate(self.peer, APIClient())
+        self.assertListChanges(
+            lambda: client.post(f'/api/connections/respond/{self.connection_id}/', {'action': 'reject'}, format='json')
+        )
+
+    def test_bulk_request_and_respond(self):
+        self.assertListChanges(
+            lambda: self.client.post('/api/connections/request/bulk/', {'receivers': ['bob']}, format='json')
+        )
+        carol = make_user('carol')
+        client = self.authenticate(carol, APIClient())
+        connection_id = client.post('/api/connections/request/', {'receiver': 'alice'}, format='json').data['id']
+        self.assertListChanges(
+            lambda: self.client.post(
+                '/api/connections/respond/', {'connection_ids': [connection_id], 'action': 'accept'}, format='json'
+            )
+        )
+
+    def test_listed_profile_edit(self):
+        self.request()
+
+        def edit():
+            self.peer.company = 'Globex'
+            self.peer.save()
+
+        self.assertListChanges(edit)
+        # Saves that change nothing shown keep the ETag
+        etag = self.client.get('/api/connections/list/')['ETag']
+        self.peer.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get('/api/connections/list/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_listed_user_deleted(self):
+        self.request()
+        self.assertListChanges(self.peer.delete)
@@ -1,18 +1,28 @@
 from django.urls import path
 from .views import (
     ConnectionRequestView,
+    bulk_connection_request,
     ConnectionListView,
     respond_to_connection,
+    bulk_respond_to_connections,
     cancel_connection_request,
-    connection_status
+    connection_status,
+    bulk_connection_status,
+    suggestions_view,
+    export_connections
 )
 
 app_name = 'connections'
 
 urlpatterns = [
     path('request/', ConnectionRequestView.as_view(), name='request'),
+    path('request/bulk/', bulk_connection_request, name='bulk_request'),
     path('list/', ConnectionListView.as_view(), name='list'),
+    path('respond/', bulk_respond_to_connections, name='bulk_respond'),
     path('respond/<int:connection_id>/', respond_to_connection, name='respond'),
     path('cancel/<int:connection_id>/', cancel_connection_request, name='cancel'),
+    path('status/', bulk_connection_status, name='bulk_status'),
     path('status/<int:user_id>/', connection_status, name='status'),
+    path('suggestions/', suggestions_view, name='suggestions'),
+    path('export/', export_connections, name='export'),
 ]
\ No newline at end of file
@@ -1,15 +1,34 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Connection
+from django.utils import timezone
+from django.utils.functional import cached_property
+from backend.conditional import ConditionalGetMixin
+from .adjacency import adjacency_cache
+from .counters import counter_counts, record_transitions
+from .export import EXPORT_FORMATS, export_stream
+from .models import Connection, ConnectionCounter, ConnectionSuggestion
 from .serializers import (
     ConnectionRequestSerializer,
+    ConnectionBulkRequestSerializer,
     ConnectionResponseSerializer,
-    ConnectionListSerializer
+    ConnectionBulkResponseSerializer,
+    ConnectionListSerializer,
+    ConnectionStatusBatchSerializer,
+    ConnectionSuggestionSerializer
 )
-from notifications.tasks import send_connection_notification
+from .tasks import update_bulk_connection_suggestions
+from notifications.tasks import send_connection_notification, send_bulk_connection_notifications
+
+User = get_user_model()
+
+SUGGESTIONS_DEFAULT_LIMIT = 10
+SUGGESTIONS_MAX_LIMIT = 50
 
 class ConnectionRequestView(generics.CreateAPIView):
     """API endpoint for sending connection requests"""
@@ -41,7 +60,86 @@ class ConnectionRequestView(generics.CreateAPIView):
         response_serializer = ConnectionListSerializer(connection)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
-class ConnectionListView(generics.ListAPIView):
+def create_connections(connections):
+    """Insert connections in one statement, or one by one if a pair already exists"""
+    try:
+        with transaction.atomic():
+            created = Connection.objects.bulk_create(connections)
+            record_transitions(
+                (connection.sender_id, connection.receiver_id, None, connection.status)
+                for connection in created
+            )
+            return created
+    except IntegrityError:
+        pass
+    
+    # A concurrent request (or a stale adjacency entry) got there first;
+    # retry each row in its own savepoint so the others still go through
+    created = []
+    for connection in connections:
+        try:
+            with transaction.atomic():
+                created.extend(Connection.objects.bulk_create([connection]))
+                record_transitions([(connection.sender_id, connection.receiver_id, None, connection.status)])
+        except IntegrityError:
+            continue
+    return created
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_connection_request(request):
+    """API endpoint for sending connection requests to many users at once"""
+    serializer = ConnectionBulkRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    # Preserve the caller's order, ignoring repeated usernames
+    usernames = list(dict.fromkeys(serializer.validated_data['receivers']))
+    message = serializer.validated_data['message']
+    
+    # All receivers are resolved in one query, existing connections from
+    # the cached adjacency of the current user
+    receiver_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+    adjacency = adjacency_cache.get(request.user.id)
+    
+    outcomes = {}
+    connections = {}
+    for username in usernames:
+        receiver_id = receiver_ids.get(username)
+        if receiver_id is None:
+            outcomes[username] = ('not_found', None)
+        elif receiver_id == request.user.id:
+            outcomes[username] = ('self', None)
+        elif receiver_id in adjacency:
+            outcomes[username] = ('exists', adjacency.get(receiver_id)[2])
+        else:
+            connections[username] = Connection.build(request.user.id, receiver_id, message=message)
+    
+    created = create_connections(list(connections.values()))
+    for username, connection in connections.items():
+        # Rows that lost a race keep no primary key
+        outcomes[username] = ('created', connection.id) if connection.id else ('exists', None)
+    
+    if created:
+        # bulk_create() skips the model signals, so do their work here
+        # once for the whole batch
+        connection_ids = [connection.id for connection in created]
+        adjacency_cache.changed(request.user.id, *(connection.receiver_id for connection in created))
+        send_bulk_connection_notifications.delay(connection_ids, 'connection_request')
+        update_bulk_connection_suggestions.delay(connection_ids)
+    
+    return Response({
+        'created': len(created),
+        'results': [
+            {
+                'receiver': username,
+                'result': outcomes[username][0],
+                'connection_id': outcomes[username][1]
+            }
+            for username in usernames
+        ]
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+class ConnectionListView(ConditionalGetMixin, generics.ListAPIView):
     """API endpoint for listing user connections"""
     serializer_class = ConnectionListSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -65,21 +163,47 @@ class ConnectionListView(generics.ListAPIView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
-        return queryset.order_by('-created_at')
+        # Senders and receivers are joined in, not fetched per row
+        return self.get_serializer_class().setup_eager_loading(queryset.order_by('-created_at', '-id'))
+    
+    def get_watermark(self):
+        # Requests, answers, cancellations and edits to any listed profile
+        # all advance the version, so no aggregate over the list is needed
+        return self.counter.version if self.counter else 0
+    
+    @cached_property
+    def counter(self):
+        return ConnectionCounter.objects.filter(user_id=self.request.user.pk).first()
+    
+    @cached_property
+    def connection_counts(self):
+        return counter_counts(self.counter)
+    
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['connection_counts'] = self.connection_counts
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def respond_to_connection(request, connection_id):
     """API endpoint for responding to connection requests"""
-    connection = get_object_or_404(
-        Connection, 
-        id=connection_id, 
-        receiver=request.user,
-        status='pending'
-    )
-    
-    serializer = ConnectionResponseSerializer(data=request.data)
-    if serializer.is_valid():
+    with transaction.atomic():
+        # Locked so a concurrent response cannot count the transition twice
+        connection = get_object_or_404(
+            ConnectionListSerializer.setup_eager_loading(Connection.objects.select_for_update(of=('self',))),
+            id=connection_id, 
+            receiver=request.user,
+            status='pending'
+        )
+        
+        serializer = ConnectionResponseSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
         action = serializer.validated_data['action']
         
         if action == 'accept':
@@ -90,32 +214,91 @@ def respond_to_connection(request, connection_id):
             message = 'Connection request rejected'
         
         connection.save()
-        
-        # Send async notification
-        send_connection_notification.delay(
-            connection.id,
-            f'connection_{action}ed'
+        record_transitions([(connection.sender_id, connection.receiver_id, 'pending', connection.status)])
+    
+    # Send async notification
+    send_connection_notification.delay(
+        connection.id,
+        f'connection_{action}ed'
+    )
+    
+    return Response({
+        'message': message,
+        'connection': ConnectionListSerializer(connection).data
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_respond_to_connections(request):
+    """API endpoint for accepting or rejecting many connection requests at once"""
+    serializer = ConnectionBulkResponseSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    action = serializer.validated_data['action']
+    new_status = 'accepted' if action == 'accept' else 'rejected'
+    connection_ids = list(dict.fromkeys(serializer.validated_data['connection_ids']))
+    
+    # Only the user's own pending requests are answered. The UPDATE is
+    # guarded by status, so the rows it changed are the answer: where row
+    # locks are not available (SQLite) a concurrent response can take some
+    # of the rows read, and those are found again by the UPDATE's stamp
+    with transaction.atomic():
+        pending = Connection.objects.filter(
+            id__in=connection_ids,
+            receiver=request.user,
+            status='pending'
+        )
+        connections = list(pending.select_for_update().only('id', 'sender_id', 'receiver_id'))
+        answered_at = timezone.now()
+        updated = pending.filter(id__in=[connection.id for connection in connections]).update(
+            status=new_status,
+            updated_at=answered_at
+        )
+        if updated != len(connections):
+            connections = list(Connection.objects.filter(
+                id__in=[connection.id for connection in connections],
+                status=new_status,
+                updated_at=answered_at
+            ).only('id', 'sender_id', 'receiver_id'))
+        record_transitions(
+            (connection.sender_id, connection.receiver_id, 'pending', new_status)
+            for connection in connections
         )
-        
-        return Response({
-            'message': message,
-            'connection': ConnectionListSerializer(connection).data
-        }, status=status.HTTP_200_OK)
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    answered = {connection.id for connection in connections}
+    if connections:
+        # update() skips the model signals, so do their work here once
+        # for the whole batch
+        adjacency_cache.changed(request.user.id, *(connection.sender_id for connection in connections))
+        send_bulk_connection_notifications.delay(list(answered), f'connection_{action}ed')
+        if new_status == 'accepted':
+            update_bulk_connection_suggestions.delay(list(answered))
+    
+    return Response({
+        'updated': len(answered),
+        'results': [
+            {
+                'connection_id': connection_id,
+                'result': new_status if connection_id in answered else 'not_found'
+            }
+            for connection_id in connection_ids
+        ]
+    }, status=status.HTTP_200_OK)
 
 @api_view(['DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def cancel_connection_request(request, connection_id):
     """API endpoint for canceling sent connection requests"""
-    connection = get_object_or_404(
-        Connection,
-        id=connection_id,
-        sender=request.user,
-        status='pending'
-    )
-    
-    connection.delete()
+    with transaction.atomic():
+        connection = get_object_or_404(
+            Connection.objects.select_for_update(),
+            id=connection_id,
+            sender=request.user,
+            status='pending'
+        )
+        
+        connection.delete()
+        record_transitions([(connection.sender_id, connection.receiver_id, 'pending', None)])
     
     return Response({
         'message': 'Connection request canceled'
@@ -125,18 +308,15 @@ def cancel_connection_request(request, connection_id):
 @permission_classes([permissions.IsAuthenticated])
 def connection_status(request, user_id):
     """API endpoint to check connection status with another user"""
-    user = request.user
-    
-    connection = Connection.objects.filter(
-        Q(sender=user, receiver_id=user_id) |
-        Q(sender_id=user_id, receiver=user)
-    ).first()
+    # Answered from the cached adjacency of the current user
+    connection = adjacency_cache.lookup(request.user.id, user_id)
     
     if connection:
+        connection_status, is_sender, connection_id = connection
         return Response({
-            'status': connection.status,
-            'is_sender': connection.sender == user,
-            'connection_id': connection.id
+            'status': connection_status,
+            'is_sender': is_sender,
+            'connection_id': connection_id
         })
     
     return Response({
@@ -144,3 +324,100 @@ def connection_status(request, user_id):
         'is_sender': False,
         'connection_id': None
     })
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_connection_status(request):
+    """API endpoint to check connection status with many users at once"""
+    serializer = ConnectionStatusBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    # Preserve the caller's order, ignoring repeated ids
+    user_ids = list(dict.fromkeys(serializer.validated_data['user_ids']))
+    adjacency = adjacency_cache.get(request.user.id)
+    
+    statuses = {}
+    for user_id in user_ids:
+        connection = adjacency.get(user_id)
+        if connection:
+            connection_status, is_sender, connection_id = connection
+            statuses[user_id] = {
+                'status': connection_status,
+                'is_sender': is_sender,
+                'connection_id': connection_id
+            }
+    
+    return Response({
+        'results': [
+            {
+                'user_id': user_id,
+                **statuses.get(user_id, {
+                    'status': 'none',
+                    'is_sender': False,
+                    'connection_id': None
+                })
+            }
+            for user_id in user_ids
+        ]
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def suggestions_view(request):
+    """API endpoint for "people you may know", read from precomputed suggestions"""
+    try:
+        limit = int(request.query_params.get('limit', SUGGESTIONS_DEFAULT_LIMIT))
+    except ValueError:
+        return Response({
+            'error': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    limit = max(1, min(limit, SUGGESTIONS_MAX_LIMIT))
+    suggestions = ConnectionSuggestionSerializer.setup_eager_loading(
+        ConnectionSuggestion.objects.filter(user=request.user).order_by('-score', 'candidate_id')
+    )
+    
+    # Requests sent since the last update are skipped using the cached
+    # adjacency; over-fetch so they do not shorten the page
+    adjacency = adjacency_cache.get(request.user.id)
+    results = [
+        suggestion for suggestion in suggestions[:limit * 2]
+        if suggestion.candidate_id not in adjacency
+    ][:limit]
+    
+    return Response({
+        'results': ConnectionSuggestionSerializer(results, many=True).data
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_connections(request):
+    """API endpoint for staff to stream the whole connection graph"""
+    # Not `format`, which DRF reserves for picking a renderer
+    export_format = request.query_params.get('output', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response({
+            'error': f'output must be one of: {", ".join(EXPORT_FORMATS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    status_filter = request.query_params.get('status')
+    if status_filter and status_filter not in dict(Connection.STATUS_CHOICES):
+        return Response({
+            'error': f'status must be one of: {", ".join(dict(Connection.STATUS_CHOICES))}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    compress = request.query_params.get('gzip', '').lower() in ('true', '1')
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f'connections.{extension}'
+    if compress:
+        content_type = 'application/gzip'
+        filename += '.gz'
+    
+    # Rows are read and written as the client downloads them, so memory
+    # use does not grow with the number of edges
+    response = StreamingHttpResponse(
+        export_stream(export_format, status=status_filter, compress=compress),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0003_keyset_indexes"),
+        ("notifications", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "is_deleted", "-created_at"],
+                name="notificatio_user_id_eb7604_idx",
+            ),
+        ),
+    ]
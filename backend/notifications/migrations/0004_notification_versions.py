@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_versions(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationVersion = apps.get_model("notifications", "NotificationVersion")
+
+    # Later changes to existing notifications only bump rows, never insert
+    user_ids = Notification.objects.order_by().values_list("user_id", flat=True).distinct()
+    NotificationVersion.objects.bulk_create(
+        [NotificationVersion(user_id=user_id) for user_id in user_ids.iterator(chunk_size=2000)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationVersion",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="notification_version",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "notification_versions",
+            },
+        ),
+        migrations.RunPython(fill_versions, migrations.RunPython.noop),
+    ]
@@ -52,6 +52,7 @@ class Notification(models.Model):
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['user', 'is_deleted']),
             models.Index(fields=['notification_type']),
+            models.Index(fields=['user', 'is_deleted', '-created_at']),
         ]
     
     def mark_as_read(self):
@@ -64,3 +65,20 @@ class Notification(models.Model):
     
     def __str__(self):
         return f"{self.title} - {self.user.full_name}"
+
+class NotificationVersion(models.Model):
+    """Per-user version of the notification list (see notifications.versions)"""
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_version'
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'notification_versions'
+    
+    def __str__(self):
+        return f"{self.user_id}: version {self.version}"
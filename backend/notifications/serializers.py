@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from backend.serializers import EagerLoadingMixin
 from .models import Notification
 from users.serializers import UserSearchSerializer
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for notifications"""
     sender = UserSearchSerializer(read_only=True)
     
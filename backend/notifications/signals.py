@@ -0,0 +1,39 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from connections.models import Connection
+from users.serializers import UserSearchSerializer
+from .models import Notification
+from .versions import bump_versions, recipient_ids, touch_versions
+
+User = get_user_model()
+
+@receiver(post_save, sender=Notification)
+def touch_version_on_save(sender, instance, **kwargs):
+    """New, read, edited and soft deleted notifications change the list"""
+    touch_versions([instance.user_id])
+
+@receiver(post_delete, sender=Connection)
+def touch_versions_on_connection_delete(sender, instance, **kwargs):
+    """The connection's notifications were deleted with it, without signals"""
+    # No inserts: a user being deleted along with the connection must not get a row
+    bump_versions([instance.sender_id, instance.receiver_id])
+
+@receiver(post_save, sender=User)
+def touch_versions_on_profile_edit(sender, instance, created=False, update_fields=None, **kwargs):
+    """Notification lists that show this user as sender pick up their edits"""
+    # A new user has sent nothing, and saves like last_login touch nothing shown
+    if created or (update_fields and not set(update_fields) & set(UserSearchSerializer.Meta.fields)):
+        return
+    bump_versions(recipient_ids(instance.pk))
+
+@receiver(pre_delete, sender=User)
+def touch_versions_on_user_delete(sender, instance, **kwargs):
+    """Notification lists lose this sender's notifications once they are deleted"""
+    # Read before the cascade, bumped after it commits (see connections.signals)
+    user_ids = set(recipient_ids(instance.pk).values_list('user_id', flat=True)) - {instance.pk}
+    if user_ids:
+        transaction.on_commit(partial(bump_versions, list(user_ids)))
@@ -1,46 +1,55 @@
 from celery import shared_task
 from django.utils import timezone
 from .models import Notification
+from .versions import touch_versions
 from connections.models import Connection
 
+def build_connection_notification(connection, notification_type):
+    """Unsaved notification for a connection event, or None for unknown types"""
+    if notification_type == 'connection_request':
+        # Notify receiver about new connection request
+        return Notification(
+            user=connection.receiver,
+            sender=connection.sender,
+            notification_type='connection_request',
+            title='New Connection Request',
+            message=f'{connection.sender.full_name} wants to connect with you.',
+            connection=connection
+        )
+    
+    elif notification_type == 'connection_accepted':
+        # Notify sender that request was accepted
+        return Notification(
+            user=connection.sender,
+            sender=connection.receiver,
+            notification_type='connection_accepted',
+            title='Connection Request Accepted',
+            message=f'{connection.receiver.full_name} accepted your connection request.',
+            connection=connection
+        )
+    
+    elif notification_type == 'connection_rejected':
+        # Notify sender that request was rejected
+        return Notification(
+            user=connection.sender,
+            sender=connection.receiver,
+            notification_type='connection_rejected',
+            title='Connection Request Rejected',
+            message=f'{connection.receiver.full_name} rejected your connection request.',
+            connection=connection
+        )
+    
+    return None
+
 @shared_task
 def send_connection_notification(connection_id, notification_type):
     """Send notification for connection events"""
     try:
         connection = Connection.objects.get(id=connection_id)
         
-        if notification_type == 'connection_request':
-            # Notify receiver about new connection request
-            Notification.objects.create(
-                user=connection.receiver,
-                sender=connection.sender,
-                notification_type='connection_request',
-                title='New Connection Request',
-                message=f'{connection.sender.full_name} wants to connect with you.',
-                connection=connection
-            )
-        
-        elif notification_type == 'connection_accepted':
-            # Notify sender that request was accepted
-            Notification.objects.create(
-                user=connection.sender,
-                sender=connection.receiver,
-                notification_type='connection_accepted',
-                title='Connection Request Accepted',
-                message=f'{connection.receiver.full_name} accepted your connection request.',
-                connection=connection
-            )
-        
-        elif notification_type == 'connection_rejected':
-            # Notify sender that request was rejected
-            Notification.objects.create(
-                user=connection.sender,
-                sender=connection.receiver,
-                notification_type='connection_rejected',
-                title='Connection Request Rejected',
-                message=f'{connection.receiver.full_name} rejected your connection request.',
-                connection=connection
-            )
+        notification = build_connection_notification(connection, notification_type)
+        if notification:
+            notification.save()
         
         return f"Notification sent for {notification_type}"
     
@@ -49,6 +58,28 @@ def send_connection_notification(connection_id, notification_type):
     except Exception as e:
         return f"Error sending notification: {str(e)}"
 
+@shared_task
+def send_bulk_connection_notifications(connection_ids, notification_type):
+    """Send one kind of notification for many connections with a single insert"""
+    try:
+        connections = Connection.objects.filter(id__in=connection_ids).select_related('sender', 'receiver')
+        
+        notifications = [
+            notification for notification in (
+                build_connection_notification(connection, notification_type)
+                for connection in connections
+            )
+            if notification
+        ]
+        Notification.objects.bulk_create(notifications)
+        # bulk_create() sends no post_save
+        touch_versions(notification.user_id for notification in notifications)
+        
+        return f"{len(notifications)} notifications sent for {notification_type}"
+    
+    except Exception as e:
+        return f"Error sending notifications: {str(e)}"
+
 @shared_task
 def cleanup_old_notifications():
     """Clean up old notifications (older than 30 days)"""
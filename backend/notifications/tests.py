@@ -1,3 +1,99 @@
-from django.test import TestCase
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from backend.testing import QueryBudgetTestCase, make_user
+from connections.models import Connection
+from .models import Notification
+from .tasks import send_bulk_connection_notifications
 
-# Create your tests here.
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """Hot notification endpoints stay within their QUERY_BUDGET"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice')
+        self.notify(5)
+        self.authenticate(self.user)
+        self.clear_caches()
+
+    def notify(self, number):
+        """`number` notifications for the user, each from a different sender"""
+        offset = Notification.objects.count()
+        Notification.objects.bulk_create(
+            Notification(
+                user=self.user,
+                sender=make_user(f'sender{offset + index}'),
+                notification_type='connection_request',
+                title='New connection request',
+                message='Wants to connect',
+                is_read=index % 2 == 0
+            )
+            for index in range(number)
+        )
+
+    def test_list(self):
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertWithinQueryBudget(response)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        with self.assertMaxQueries(3) as first:
+            response = self.client.get('/api/notifications/')
+        self.assertEqual(len(response.data['results']), 5)
+
+        self.notify(5)
+        caches['auth_users'].clear()
+        with self.assertNumQueries(first.count):
+            response = self.client.get('/api/notifications/')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_unread_count(self):
+        response = self.client.get('/api/notifications/unread_count/')
+        self.assertEqual(response.data['unread_count'], 2)
+        self.assertWithinQueryBudget(response)
+
+
+class NotificationListVersionTests(QueryBudgetTestCase):
+    """The list's ETag changes with every write that changes the list"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice')
+        self.sender = make_user('bob')
+        self.connection = Connection.objects.create(sender=self.sender, receiver=self.user)
+        send_bulk_connection_notifications([self.connection.id], 'connection_request')
+        self.notification = Notification.objects.get(user=self.user)
+        self.authenticate(self.user)
+
+    def assertListChanges(self, change):
+        etag = self.client.get('/api/notifications/')['ETag']
+        self.assertEqual(self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_notifications(self):
+        other = Connection.objects.create(sender=make_user('carol'), receiver=self.user)
+        self.assertListChanges(lambda: send_bulk_connection_notifications([other.id], 'connection_request'))
+
+    def test_read_and_deleted_notifications(self):
+        self.assertListChanges(lambda: self.client.post(f'/api/notifications/{self.notification.id}/mark_as_read/'))
+        self.notification.is_read = False
+        self.notification.save()
+        self.assertListChanges(lambda: self.client.post('/api/notifications/mark_all_as_read/'))
+        self.assertListChanges(lambda: self.client.delete(f'/api/notifications/{self.notification.id}/soft_delete/'))
+
+    def test_notifications_deleted_with_their_connection(self):
+        client = self.authenticate(self.sender, APIClient())
+        self.assertListChanges(lambda: client.delete(f'/api/connections/cancel/{self.connection.id}/'))
+        self.assertEqual(self.client.get('/api/notifications/').data['results'], [])
+
+    def test_sender_profile_edit(self):
+        def edit():
+            self.sender.full_name = 'Robert'
+            self.sender.save()
+
+        self.assertListChanges(edit)
+
+    def test_sender_deleted(self):
+        self.assertListChanges(self.sender.delete)
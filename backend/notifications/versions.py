@@ -0,0 +1,51 @@
+from django.db.models import F
+from connections.suggestions import chunked
+from .models import Notification, NotificationVersion
+
+
+def touch_versions(user_ids):
+    """
+    Advance the notification list version of each user.
+    
+    Call this after every write that changes what a user's list shows, so
+    the list's ETag is a primary key lookup instead of aggregates over the
+    notifications and their senders. Users without a row get one, and are
+    then updated like the others; every user with notifications has one.
+    """
+    user_ids = list(set(user_ids))
+    missing = []
+    for chunk in chunked(user_ids):
+        updated = bump_versions(chunk)
+        if updated < len(chunk):
+            existing = set(NotificationVersion.objects.filter(user_id__in=chunk).values_list('user_id', flat=True))
+            missing.extend(user_id for user_id in chunk if user_id not in existing)
+    if not missing:
+        return
+    
+    # A row another transaction inserted in the meantime is kept and bumped
+    NotificationVersion.objects.bulk_create(
+        [NotificationVersion(user_id=user_id) for user_id in missing],
+        ignore_conflicts=True
+    )
+    for chunk in chunked(missing):
+        bump_versions(chunk)
+
+
+def bump_versions(user_ids):
+    """
+    Advance the versions of users that have a row; returns rows changed.
+    
+    For changes to existing notifications, whose users already have a row.
+    `user_ids` may be a subquery.
+    """
+    return NotificationVersion.objects.filter(user_id__in=user_ids).update(version=F('version') + 1)
+
+
+def load_version(user_id):
+    """A user's notification list version; 0 until their list first changes"""
+    return NotificationVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+
+
+def recipient_ids(sender_id):
+    """Users with notifications from `sender_id`, whose lists show that sender"""
+    return Notification.objects.filter(sender_id=sender_id).values('user_id')
@@ -1,15 +1,16 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from backend.conditional import ConditionalGetMixin
 from .models import Notification
+from .versions import load_version, touch_versions
 from .serializers import (
     NotificationSerializer,
     NotificationCreateSerializer,
     NotificationUpdateSerializer
 )
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing notifications"""
     permission_classes = [permissions.IsAuthenticated]
     
@@ -37,7 +38,21 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if notification_type:
             queryset = queryset.filter(notification_type=notification_type)
         
-        return queryset.order_by('-created_at')
+        queryset = queryset.order_by('-created_at', '-id')
+        
+        # Senders are joined in, not fetched per row
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+    
+    def get_watermark(self):
+        # Every write to the user's notifications, and every edit to a
+        # sender shown in them, advances the version (see .versions)
+        return load_version(self.request.user.pk)
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -54,11 +69,18 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_all_as_read(self, request):
         """Mark all notifications as read"""
         updated_count = self.get_queryset().filter(is_read=False).update(is_read=True)
+        if updated_count:
+            # update() sends no post_save
+            touch_versions([request.user.pk])
         
         return Response({
             'message': f'{updated_count} notifications marked as read'
         }, status=status.HTTP_200_OK)
     
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        touch_versions([instance.user_id])
+    
     @action(detail=True, methods=['delete'])
     def soft_delete(self, request, pk=None):
         """Soft delete a notification"""
@@ -0,0 +1,42 @@
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_ALIAS = 'auth_users'
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_cached_user(user):
+    """Drop a user from the authentication cache after it changed"""
+    caches[USER_CACHE_ALIAS].delete(user_cache_key(getattr(user, api_settings.USER_ID_FIELD)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through a local cache.
+    
+    Active users are kept in the `auth_users` cache (local memory, bounded
+    by TIMEOUT and MAX_ENTRIES) so hot endpoints skip the per-request user
+    query. Saving or deleting a user invalidates its entry in this process
+    (see `users.signals`); other processes pick up the change once their
+    entry expires. Views that return the user's own data (the profile)
+    read the row fresh instead of trusting `request.user`.
+    """
+    
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        # Revocation checks compare against the stored password every time
+        if user_id is None or getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            return super().get_user(validated_token)
+        
+        cache = caches[USER_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Raises for unknown or inactive users, so only active ones are cached
+            user = super().get_user(validated_token)
+            cache.set(key, user)
+        return user
@@ -0,0 +1,273 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import partial
+
+from django.db import connection
+from django.db.models import Count, Func, Max, Q, Subquery
+
+logger = logging.getLogger(__name__)
+
+# Fields whose values (and individual words) are matched by prefix
+INDEXED_FIELDS = ('username', 'full_name', 'company')
+
+# Fields returned for each suggestion, served straight from memory
+RESULT_FIELDS = ('id', 'user_id', 'username', 'full_name', 'company')
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Seconds between checks of the users table for changes made elsewhere
+REFRESH_INTERVAL = 5
+
+
+def normalize(value):
+    return ' '.join(value.split()).casefold()
+
+
+def index_keys(values):
+    """Return the normalized prefix keys for a user's indexed field values"""
+    keys = set()
+    for value in values:
+        value = normalize(value or '')
+        if not value:
+            continue
+        keys.add(value)
+        keys.update(value.split(' '))
+    return keys
+
+
+class PrefixIndex:
+    """
+    In-process prefix index over active users for type-ahead lookups.
+    
+    Keys are kept in a sorted array of `(key, user pk)` pairs, so a lookup is
+    a binary search followed by a short forward scan. The index is loaded
+    from the database on first use and then kept current by the `User`
+    post_save/post_delete signal handlers in `users.signals`, once their
+    transaction commits.
+    
+    Signals only reach the process that saved the user, so at most every
+    REFRESH_INTERVAL seconds a lookup also reads a watermark of the users
+    table (active count, latest updated_at). Users saved since the last
+    watermark are re-read and applied; a count that no longer matches
+    (deletions, queryset updates that skip updated_at) rebuilds the index
+    on a background thread while lookups keep using the current one.
+    `invalidate()` drops the contents; the next lookup loads them again.
+    
+    Reads from the database never hold `_lock`, which only guards the
+    in-memory arrays. Changes signalled while a read is in flight are
+    journaled: a rebuild replays them onto the new index before swapping
+    it in, and a watermark check skips its count comparison, since the
+    count may predate them.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Held by the one thread reading from the database at a time
+        self._reload_lock = threading.Lock()
+        self._loaded = False
+        self._keys = []
+        self._entries = {}
+        self._latest = None
+        self._checked_at = 0
+        self._journal = None
+        self._generation = 0
+    
+    def _watermark(self):
+        from .models import User
+        
+        return User.objects.aggregate(
+            active=Count('id', filter=Q(is_active=True)),
+            latest=Max('updated_at')
+        )
+    
+    def _start_journal(self):
+        with self._lock:
+            self._journal = []
+            return self._generation
+    
+    def _record(self, change):
+        """Apply a signalled change now, and journal it for a read in flight"""
+        if self._journal is not None:
+            self._journal.append(change)
+        if self._loaded:
+            change()
+    
+    def _build(self):
+        """Read a complete index from the database, without holding the lock"""
+        from .models import User
+        
+        # Read first, so users saved during the load are caught up later
+        latest = self._watermark()['latest']
+        keys = []
+        entries = {}
+        rows = User.objects.filter(is_active=True).values_list(*RESULT_FIELDS, 'updated_at')
+        for row in rows.iterator(chunk_size=5000):
+            entry = dict(zip(RESULT_FIELDS, row))
+            entry_keys = index_keys(entry[field] for field in INDEXED_FIELDS)
+            entries[entry['id']] = (entry, entry_keys, row[-1])
+            keys.extend((key, entry['id']) for key in entry_keys)
+        keys.sort()
+        return keys, entries, latest
+    
+    def _reload(self):
+        """Build a new index and swap it in; call with `_reload_lock` held"""
+        generation = self._start_journal()
+        try:
+            keys, entries, latest = self._build()
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        
+        # Swapped in and replayed in one go, so no change falls in between
+        with self._lock:
+            journal, self._journal = self._journal, None
+            if generation != self._generation:
+                # invalidate() ran meanwhile; the rows read may predate its cause
+                return
+            self._keys = keys
+            self._entries = entries
+            self._latest = latest
+            self._checked_at = time.monotonic()
+            self._loaded = True
+            for change in journal:
+                change()
+    
+    def _reload_in_background(self):
+        with self._reload_lock:
+            try:
+                self._reload()
+            except Exception:
+                logger.exception('Failed to rebuild the autocomplete index')
+            finally:
+                # Do not hold a connection open in a finished thread
+                connection.close()
+    
+    def _ensure_loaded(self):
+        while not self._loaded:
+            with self._reload_lock:
+                if not self._loaded:
+                    self._reload()
+    
+    def _catch_up(self):
+        """Apply users saved since the last check; False if the index has drifted"""
+        from .models import User
+        
+        latest = self._latest
+        self._start_journal()
+        try:
+            watermark = self._watermark()
+            active = watermark['active']
+            rows = []
+            if watermark['latest'] and (latest is None or watermark['latest'] > latest):
+                # The count to compare is read by the same statement as the rows,
+                # so a user registered between two reads cannot tell them apart
+                active_count = User.objects.filter(is_active=True).order_by().annotate(
+                    total=Func('id', function='COUNT')
+                ).values('total')
+                # >= so users sharing the old watermark's timestamp are not missed
+                changed = User.objects.order_by().annotate(active=Subquery(active_count))
+                if latest is not None:
+                    changed = changed.filter(updated_at__gte=latest)
+                rows = list(changed.values_list(*RESULT_FIELDS, 'is_active', 'updated_at', 'active'))
+                if rows:
+                    active = rows[0][-1]
+        finally:
+            with self._lock:
+                journal, self._journal = self._journal, None
+        
+        with self._lock:
+            for *values, is_active, updated_at, _ in rows:
+                self._apply(dict(zip(RESULT_FIELDS, values)), is_active, updated_at)
+            self._latest = max(filter(None, [latest, watermark['latest'], *(row[-2] for row in rows)]), default=None)
+            return bool(journal) or active == len(self._entries)
+    
+    def _refresh(self):
+        """Catch up with users saved by other processes"""
+        if time.monotonic() - self._checked_at < REFRESH_INTERVAL:
+            return
+        # One thread checks; the others keep serving the current index
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            if not self._loaded or time.monotonic() - self._checked_at < REFRESH_INTERVAL:
+                return
+            self._checked_at = time.monotonic()
+            if self._catch_up():
+                return
+        finally:
+            self._reload_lock.release()
+        threading.Thread(
+            target=self._reload_in_background,
+            name='autocomplete-reload',
+            daemon=True
+        ).start()
+    
+    def _discard(self, pk):
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            position = bisect_left(self._keys, (key, pk))
+            if position < len(self._keys) and self._keys[position] == (key, pk):
+                del self._keys[position]
+    
+    def _apply(self, entry, is_active, updated_at):
+        current = self._entries.get(entry['id'])
+        if current is not None and updated_at is not None and current[2] is not None and updated_at < current[2]:
+            # A replayed or late read of an older version of the row
+            return
+        self._discard(entry['id'])
+        if not is_active:
+            return
+        entry_keys = index_keys(entry[field] for field in INDEXED_FIELDS)
+        self._entries[entry['id']] = (entry, entry_keys, updated_at)
+        for key in entry_keys:
+            insort(self._keys, (key, entry['id']))
+    
+    def update(self, user):
+        """Add, refresh or drop a single user after it was saved"""
+        entry = {field: getattr(user, field) for field in RESULT_FIELDS}
+        with self._lock:
+            self._record(partial(self._apply, entry, user.is_active, user.updated_at))
+    
+    def remove(self, pk):
+        """Drop a deleted user from the index"""
+        with self._lock:
+            self._record(partial(self._discard, pk))
+    
+    def invalidate(self):
+        """Forget the current contents; the next lookup reloads them"""
+        with self._lock:
+            self._generation += 1
+            self._loaded = False
+            self._keys = []
+            self._entries = {}
+    
+    def lookup(self, prefix, limit=DEFAULT_LIMIT, exclude=None):
+        """Return up to `limit` users with a key starting with `prefix`"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        
+        self._ensure_loaded()
+        self._refresh()
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(results) < limit:
+                key, pk = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if pk not in seen and pk != exclude:
+                    seen.add(pk)
+                    results.append(dict(self._entries[pk][0]))
+                position += 1
+        return results
+
+
+autocomplete_index = PrefixIndex()
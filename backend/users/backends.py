@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from .hashing import password_hashing_pool, verify_password
+
+UserModel = get_user_model()
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that verifies passwords on the bounded hashing pool.
+    
+    The user lookup stays on the request thread; only the PBKDF2 work is
+    handed to the pool, which answers with HTTP 503 when saturated.
+    `aauthenticate` (used by the async login view) awaits the same work.
+    """
+    
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as known ones
+            password_hashing_pool.run(make_password, password)
+            return None
+        
+        is_correct, needs_update = password_hashing_pool.run(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        
+        if needs_update:
+            # Hasher settings changed since this hash was stored
+            user.password = password_hashing_pool.run(make_password, password)
+            user.save(update_fields=['password'])
+        return user
+    
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await password_hashing_pool.arun(make_password, password)
+            return None
+        
+        is_correct, needs_update = await password_hashing_pool.arun(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        
+        if needs_update:
+            user.password = await password_hashing_pool.arun(make_password, password)
+            await user.asave(update_fields=['password'])
+        return user
@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 5,
+    'SYNC_OVERLAP': 30,
+    'REBUILD_INTERVAL': 3600,
+    'PRUNE_CHUNK_SIZE': 1000,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_BLACKLIST', {})}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)"""
+    
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+    
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlacklist:
+    """
+    Revoked refresh tokens, with an in-process Bloom filter in front.
+    
+    Most lookups are for tokens that were never revoked; the filter answers
+    those from memory and only possible hits are confirmed against the
+    `revoked_tokens` table. Each process adds rows revoked elsewhere to its
+    filter at most SYNC_INTERVAL seconds later and rebuilds the filter from
+    unexpired rows every REBUILD_INTERVAL seconds (or once it is over
+    capacity) so expired tokens stop occupying it.
+    
+    Syncs read rows by `revoked_at`, starting SYNC_OVERLAP seconds before
+    the previous read began: ids are allocated before commit, so a row can
+    become visible after one with a higher id, and the window also covers
+    clock skew between servers. Rebuilds run on a background thread and
+    are swapped in; until the first one finishes every lookup is checked
+    against the table. The database is never read while `_lock` is held.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held by the one thread reading from the database at a time
+        self._sync_lock = threading.Lock()
+        self._filter = None
+        self._journal = None
+        self._read_from = None
+        self._synced_at = 0
+        self._built_at = 0
+    
+    def _build(self):
+        """Read a filter of every unexpired revocation, without holding the lock"""
+        from .models import RevokedToken
+        
+        config = get_config()
+        started = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=started)
+        capacity = max(config['CAPACITY'], rows.count() * 2)
+        bloom = BloomFilter(capacity, config['ERROR_RATE'])
+        for jti in rows.values_list('jti', flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        return bloom, started
+    
+    def _rebuild(self):
+        """Build a new filter and swap it in; call with `_sync_lock` held"""
+        with self._lock:
+            self._journal = []
+        try:
+            bloom, started = self._build()
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        
+        # Replayed and swapped in one go, so no revocation falls in between
+        with self._lock:
+            # Revoked here while the rows were read
+            for jti in self._journal:
+                bloom.add(jti)
+            self._journal = None
+            self._filter = bloom
+            self._read_from = started
+            self._built_at = self._synced_at = time.monotonic()
+    
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        except Exception:
+            logger.exception('Failed to rebuild the token blacklist filter')
+        finally:
+            # Acquired by _refresh() on the request thread that started this one
+            self._sync_lock.release()
+            # Do not hold a connection open in a finished thread
+            connection.close()
+    
+    def _sync(self):
+        """Add rows revoked by other processes; call with `_sync_lock` held"""
+        from .models import RevokedToken
+        
+        started = timezone.now()
+        overlap = timedelta(seconds=get_config()['SYNC_OVERLAP'])
+        rows = RevokedToken.objects.filter(revoked_at__gte=self._read_from - overlap)
+        jtis = list(rows.values_list('jti', flat=True))
+        
+        with self._lock:
+            for jti in jtis:
+                # The overlap reads rows again; count each one once
+                if jti not in self._filter:
+                    self._filter.add(jti)
+            self._read_from = started
+            self._synced_at = time.monotonic()
+    
+    def _refresh(self):
+        config = get_config()
+        now = time.monotonic()
+        bloom = self._filter
+        rebuild = (
+            bloom is None or
+            now - self._built_at >= config['REBUILD_INTERVAL'] or
+            bloom.count >= bloom.capacity
+        )
+        if not rebuild and now - self._synced_at < config['SYNC_INTERVAL']:
+            return
+        # One thread reads; the others keep using the current filter
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        if rebuild:
+            threading.Thread(
+                target=self._rebuild_in_background,
+                name='token-blacklist-rebuild',
+                daemon=True
+            ).start()
+            return
+        try:
+            self._sync()
+        finally:
+            self._sync_lock.release()
+    
+    def contains(self, jti):
+        """Return whether the token with this jti has been revoked"""
+        from .models import RevokedToken
+        
+        self._refresh()
+        with self._lock:
+            maybe_revoked = self._filter is None or jti in self._filter
+        if not maybe_revoked:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+    
+    def add(self, token):
+        """Revoke a refresh token; returns False if it already was revoked"""
+        from .models import RevokedToken
+        
+        jti = token[api_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=datetime_from_epoch(token['exp']))
+        except IntegrityError:
+            return False
+        
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(jti)
+            if self._filter is not None:
+                self._filter.add(jti)
+        return True
+    
+    def prune(self, chunk_size=None):
+        """Delete expired rows in chunks; returns the number deleted"""
+        from .models import RevokedToken
+        
+        chunk_size = chunk_size or get_config()['PRUNE_CHUNK_SIZE']
+        now = timezone.now()
+        deleted = 0
+        while True:
+            ids = list(
+                RevokedToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                return deleted
+            deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
+
+
+token_blacklist = TokenBlacklist()
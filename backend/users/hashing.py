@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+def verify_password(password, encoded):
+    """Check `password` against `encoded`, also reporting if it needs rehashing"""
+    needs_update = []
+    is_correct = check_password(password, encoded, setter=needs_update.append)
+    return is_correct, bool(needs_update)
+
+
+class HashingPoolBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Authentication is temporarily overloaded, please retry shortly.'
+    default_code = 'hashing_pool_busy'
+    
+    def __init__(self, wait=None):
+        super().__init__()
+        # Picked up by DRF's exception handler as a Retry-After header
+        self.wait = wait
+
+
+class PasswordHashingPool:
+    """
+    Bounded executor for password hashing and verification.
+    
+    At most MAX_WORKERS hashes run at once (PBKDF2 releases the GIL, so
+    they run in parallel) and at most MAX_PENDING may be queued or running;
+    beyond that `run` fails fast with `HashingPoolBusy` (HTTP 503) instead
+    of letting a login burst pile up CPU-bound work and starve unrelated
+    requests served by the same worker.
+    
+    `run` blocks the calling thread until its hash is done (or TIMEOUT
+    passes), so a sync view waiting on the pool still occupies its server
+    worker. `arun` awaits the hash instead: the async login and
+    registration views use it, and under ASGI the event loop serves other
+    requests while the pool works.
+    """
+    
+    def __init__(self, max_workers=None, max_pending=None, timeout=None):
+        config = settings.PASSWORD_HASHING_POOL
+        self.max_workers = max_workers or config['MAX_WORKERS']
+        self.max_pending = max_pending or config['MAX_PENDING']
+        self.timeout = timeout or config['TIMEOUT']
+        self.retry_after = config['RETRY_AFTER']
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='password-hashing'
+                    )
+        return self._executor
+    
+    def submit(self, func, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolBusy(wait=self.retry_after)
+        try:
+            future = self._get_executor().submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+    
+    def run(self, func, *args, **kwargs):
+        """Run `func` on the pool, blocking the caller until its result is ready"""
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingPoolBusy(wait=self.retry_after)
+    
+    async def arun(self, func, *args, **kwargs):
+        """Run `func` on the pool, awaiting its result without blocking the event loop"""
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise HashingPoolBusy(wait=self.retry_after)
+
+
+password_hashing_pool = PasswordHashingPool()
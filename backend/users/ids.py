@@ -0,0 +1,98 @@
+import string
+import threading
+from collections import deque
+
+from django.db import connections, router, transaction
+from django.db.models import F
+
+ALPHABET = string.ascii_uppercase + string.digits
+ID_LENGTH = 10
+ID_SPACE = len(ALPHABET) ** ID_LENGTH
+
+# Sequence values are spread over the ID space with an affine permutation so
+# consecutive users do not get consecutive (guessable) IDs. The multiplier is
+# coprime with 36, which makes the mapping a bijection: distinct sequence
+# values always encode to distinct IDs.
+MULTIPLIER = 2259630184213715  # ~ golden ratio * ID_SPACE
+OFFSET = 1442695040888963407 % ID_SPACE
+
+USER_ID_SEQUENCE = 'user_id'
+BLOCK_SIZE = 100
+
+# Keep `user_id__in` lookups well under SQLite's bound parameter limit
+COLLISION_CHECK_CHUNK = 900
+
+
+def encode_user_id(value):
+    """Map a sequence value onto a unique 10-character user ID"""
+    value = (value * MULTIPLIER + OFFSET) % ID_SPACE
+    chars = []
+    for _ in range(ID_LENGTH):
+        value, index = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+class UserIdAllocator:
+    """
+    Hands out unique user IDs from blocks reserved in the `id_sequences` table.
+    
+    A reservation is a single `UPDATE ... SET next_value = next_value + n`
+    in its own transaction, so concurrent workers always receive disjoint
+    ranges. Each process serves IDs from its current block without touching
+    the database until the block runs out.
+    
+    Inside an outer transaction exactly the requested number of IDs is
+    reserved instead: if that transaction rolls back the reservation rolls
+    back with it, and a cached leftover block could then be handed out to
+    another worker as well.
+    """
+    
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pools = {}
+    
+    def allocate(self, count=1, using=None):
+        """Return `count` unused user IDs"""
+        from .models import User
+        
+        using = using or router.db_for_write(User)
+        if connections[using].in_atomic_block:
+            return self._reserve(count, using)
+        
+        with self._lock:
+            pool = self._pools.setdefault(using, deque())
+            if len(pool) < count:
+                pool.extend(self._reserve(max(count - len(pool), self.block_size), using))
+            return [pool.popleft() for _ in range(count)]
+    
+    def _reserve(self, count, using):
+        from .models import IdSequence, User
+        
+        sequences = IdSequence.objects.using(using)
+        with transaction.atomic(using=using):
+            updated = sequences.filter(name=USER_ID_SEQUENCE).update(
+                next_value=F('next_value') + count
+            )
+            if not updated:
+                sequences.create(name=USER_ID_SEQUENCE, next_value=count)
+            end = sequences.values_list('next_value', flat=True).get(name=USER_ID_SEQUENCE)
+        
+        user_ids = [encode_user_id(value) for value in range(end - count, end)]
+        
+        # Users created before the allocator existed carry random IDs, one
+        # of which may coincide with a freshly encoded ID; skip those.
+        taken = set()
+        for start in range(0, len(user_ids), COLLISION_CHECK_CHUNK):
+            chunk = user_ids[start:start + COLLISION_CHECK_CHUNK]
+            taken.update(
+                User.objects.using(using).filter(user_id__in=chunk).values_list('user_id', flat=True)
+            )
+        if taken:
+            user_ids = [user_id for user_id in user_ids if user_id not in taken]
+            user_ids.extend(self._reserve(len(taken), using))
+        return user_ids
+
+
+user_id_allocator = UserIdAllocator()
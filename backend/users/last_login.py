@@ -0,0 +1,89 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 30,
+    'MAX_PENDING': 1000,
+}
+
+
+class LastLoginBuffer:
+    """
+    Coalesces `last_login` writes for stateless (token-only) logins.
+    
+    Logins only stamp the in-memory user and remember the timestamp; a
+    background thread writes everything pending every FLUSH_INTERVAL
+    seconds with `bulk_update`, so a user logging in repeatedly costs one
+    row update per interval and many users cost one batched UPDATE. The
+    buffer is also flushed when MAX_PENDING users are waiting and at
+    interpreter exit.
+    """
+    
+    def __init__(self, flush_interval=None, max_pending=None):
+        config = {**DEFAULTS, **getattr(settings, 'LAST_LOGIN_BUFFER', {})}
+        self.flush_interval = flush_interval or config['FLUSH_INTERVAL']
+        self.max_pending = max_pending or config['MAX_PENDING']
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+    
+    def add(self, user):
+        user.last_login = timezone.now()
+        with self._lock:
+            self._pending[user.pk] = user.last_login
+            full = len(self._pending) >= self.max_pending
+            if self._flusher is None:
+                self._start_flusher()
+        if full:
+            self.flush()
+    
+    def flush(self):
+        """Write every pending last_login; returns the number of users updated"""
+        from .models import User
+        
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        
+        users = [User(pk=pk, last_login=last_login) for pk, last_login in pending.items()]
+        try:
+            User.objects.bulk_update(users, ['last_login'], batch_size=500)
+        except Exception:
+            # Keep the timestamps for the next attempt unless newer ones arrived
+            with self._lock:
+                for pk, last_login in pending.items():
+                    self._pending.setdefault(pk, last_login)
+            raise
+        return len(users)
+    
+    def _start_flusher(self):
+        self._flusher = threading.Thread(
+            target=self._run,
+            name='last-login-flush',
+            daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.flush)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush buffered last_login updates')
+            finally:
+                # Do not hold a connection open between flushes
+                connection.close()
+
+
+last_login_buffer = LastLoginBuffer()
@@ -0,0 +1,211 @@
+import random
+import time
+from bisect import bisect
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from connections.counters import recount
+from connections.models import Connection
+from notifications.models import Notification
+from users.autocomplete import autocomplete_index
+from users.ids import user_id_allocator
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+    'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+    'Thomas', 'Sarah', 'Charles', 'Karen', 'Aarav', 'Priya', 'Wei', 'Mei', 'Omar', 'Fatima',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+    'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor',
+    'Moore', 'Jackson', 'Martin', 'Lee', 'Sharma', 'Chen', 'Wang', 'Khan', 'Ali', 'Kim',
+]
+INDUSTRIES = [
+    'Technology', 'Finance', 'Healthcare', 'Education', 'Marketing', 'Design',
+    'Manufacturing', 'Retail', 'Research', 'Consulting', 'Media', 'Logistics',
+]
+COMPANY_WORDS = [
+    'Tech', 'Digital', 'Global', 'Innovation', 'Data', 'Cloud', 'Green', 'Blue',
+    'Summit', 'Apex', 'Vertex', 'Nova', 'Quantum', 'Bright', 'Core', 'Prime',
+]
+COMPANY_SUFFIXES = ['Corp', 'Labs', 'Solutions', 'Systems', 'Group', 'Partners', 'Studio', 'Inc']
+CITIES = ['New York, NY', 'Los Angeles, CA', 'Chicago, IL', 'Austin, TX', 'Seattle, WA', 'Boston, MA']
+
+# Share of generated connections in each status
+STATUS_WEIGHTS = [('accepted', 60), ('pending', 30), ('rejected', 10)]
+
+NOTIFICATION_TEMPLATES = {
+    'connection_request': ('New Connection Request', '{} wants to connect with you.'),
+    'connection_accepted': ('Connection Request Accepted', '{} accepted your connection request.'),
+    'connection_rejected': ('Connection Request Rejected', '{} rejected your connection request.'),
+    'general': ('Welcome', 'Hello from {}.'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic dataset of users, connections and notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Number of users to create')
+        parser.add_argument(
+            '--avg-connections',
+            type=float,
+            default=10,
+            help='Mean connection requests sent per user (power-law distributed)'
+        )
+        parser.add_argument(
+            '--notifications-per-user',
+            type=int,
+            default=5,
+            help='Notifications created for every user'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument(
+            '--prefix',
+            default='load',
+            help='Prefix for generated usernames, emails and contacts'
+        )
+        parser.add_argument('--password', default='loadtest123', help='Password for every generated user')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        count = options['users']
+        prefix = options['prefix']
+        if count < 2:
+            raise CommandError('--users must be at least 2')
+        if not prefix.isalnum() or len(prefix) > 8:
+            raise CommandError('--prefix must be alphanumeric and at most 8 characters')
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Users with prefix "{prefix}" already exist; choose another --prefix')
+
+        user_ids, names = self.timed('users', lambda: self.create_users(count, prefix, options['password']))
+        self.timed('connections', lambda: self.create_connections(user_ids, options['avg_connections']))
+        self.timed(
+            'notifications',
+            lambda: self.create_notifications(user_ids, names, options['notifications_per_user'])
+        )
+
+        # bulk_create bypasses the signals that maintain the index, and the
+        # request paths that maintain the connection counters
+        autocomplete_index.invalidate()
+        self.timed('connection counters', lambda: (None, recount(user_ids)))
+
+    def timed(self, label, step):
+        started = time.monotonic()
+        result, rows = step()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {rows} {label} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)'
+            )
+        )
+        return result
+
+    def insert(self, model, objects):
+        with transaction.atomic():
+            return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_users(self, count, prefix, password):
+        rng = self.rng
+        # Hashing is deliberately slow; every generated user shares one hash
+        password_hash = make_password(password)
+        companies = [
+            f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}'
+            for _ in range(max(1, count // 50))
+        ]
+        # A few large employers and a long tail of small ones
+        company_weights = list(accumulate(rng.paretovariate(1.2) for _ in companies))
+
+        pks = []
+        # Shared string objects keep a name per user cheap at 10^6 users
+        names = []
+        distinct_names = {}
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            users = []
+            for index, user_id in zip(range(start, start + size), user_id_allocator.allocate(size)):
+                full_name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+                full_name = distinct_names.setdefault(full_name, full_name)
+                names.append(full_name)
+                users.append(User(
+                    username=f'{prefix}_{index}',
+                    email=f'{prefix}.{index}@example.com',
+                    password=password_hash,
+                    full_name=full_name,
+                    contact=f'{prefix}{index:010d}',
+                    company=companies[bisect(company_weights, rng.random() * company_weights[-1])],
+                    address=f'{rng.randint(1, 9999)} Main Street, {rng.choice(CITIES)}',
+                    industry=rng.choice(INDUSTRIES),
+                    user_id=user_id,
+                ))
+            pks.extend(user.pk for user in self.insert(User, users))
+        return (pks, names), len(pks)
+
+    def create_connections(self, user_ids, avg_connections):
+        rng = self.rng
+        count = len(user_ids)
+        alpha = 2.0
+        # Pareto(alpha) has mean alpha / (alpha - 1); rescale to the requested mean
+        scale = avg_connections * (alpha - 1) / alpha
+        max_degree = count - 1
+        # Popular users receive disproportionately many requests
+        popularity = list(accumulate(rng.paretovariate(1.5) for _ in range(count)))
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        status_weights = [weight for _, weight in STATUS_WEIGHTS]
+
+        pairs = set()
+        batch = []
+        created = 0
+        for sender_index in range(count):
+            degree = min(int(rng.paretovariate(alpha) * scale), max_degree)
+            for _ in range(degree):
+                receiver_index = bisect(popularity, rng.random() * popularity[-1])
+                pair = (min(sender_index, receiver_index), max(sender_index, receiver_index))
+                if receiver_index == sender_index or pair in pairs:
+                    continue
+                pairs.add(pair)
+                batch.append(Connection.build(
+                    user_ids[sender_index],
+                    user_ids[receiver_index],
+                    status=rng.choices(statuses, status_weights)[0],
+                    message='Hi, let\'s connect!',
+                ))
+                if len(batch) >= self.batch_size:
+                    created += len(self.insert(Connection, batch))
+                    batch = []
+        if batch:
+            created += len(self.insert(Connection, batch))
+        return None, created
+
+    def create_notifications(self, user_ids, names, per_user):
+        rng = self.rng
+        types = list(NOTIFICATION_TEMPLATES)
+
+        batch = []
+        created = 0
+        for user_id in user_ids:
+            for _ in range(per_user):
+                notification_type = rng.choice(types)
+                title, message = NOTIFICATION_TEMPLATES[notification_type]
+                sender_index = rng.randrange(len(user_ids))
+                batch.append(Notification(
+                    user_id=user_id,
+                    sender_id=user_ids[sender_index],
+                    notification_type=notification_type,
+                    title=title,
+                    message=message.format(names[sender_index]),
+                    is_read=rng.random() < 0.5,
+                ))
+                if len(batch) >= self.batch_size:
+                    created += len(self.insert(Notification, batch))
+                    batch = []
+        if batch:
+            created += len(self.insert(Notification, batch))
+        return None, created
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:03
+
+import django.db.models.deletion
+import users.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+SEARCH_DOCUMENT = (
+    "{row}.username || char(10) || {row}.full_name || char(10) || "
+    "{row}.company || char(10) || {row}.email || char(10) || {row}.contact"
+)
+
+CREATE_SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE users_fts USING fts5(document, tokenize='trigram')",
+    "INSERT INTO users_fts(rowid, document) "
+    f"SELECT id, {SEARCH_DOCUMENT.format(row='users')} FROM users",
+    "CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN "
+    f"INSERT INTO users_fts(rowid, document) VALUES (new.id, {SEARCH_DOCUMENT.format(row='new')}); "
+    "END",
+    "CREATE TRIGGER users_fts_update AFTER UPDATE OF username, full_name, company, email, contact ON users "
+    "WHEN old.username IS NOT new.username OR old.full_name IS NOT new.full_name "
+    "OR old.company IS NOT new.company OR old.email IS NOT new.email "
+    "OR old.contact IS NOT new.contact BEGIN "
+    f"UPDATE users_fts SET document = {SEARCH_DOCUMENT.format(row='new')} WHERE rowid = new.id; "
+    "END",
+    "CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN "
+    "DELETE FROM users_fts WHERE rowid = old.id; "
+    "END",
+]
+
+DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS users_fts_insert",
+    "DROP TRIGGER IF EXISTS users_fts_update",
+    "DROP TRIGGER IF EXISTS users_fts_delete",
+    "DROP TABLE IF EXISTS users_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite specific; other backends fall back to icontains search
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in CREATE_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSearchIndex",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("document", users.models.SearchDocumentField()),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "users_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+def create_user_id_sequence(apps, schema_editor):
+    IdSequence = apps.get_model("users", "IdSequence")
+    IdSequence.objects.using(schema_editor.connection.alias).get_or_create(
+        name="user_id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("next_value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "id_sequences",
+            },
+        ),
+        migrations.RunPython(create_user_id_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_revoked_token"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="revokedtoken",
+            name="revoked_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -1,8 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import models, router
+from django.db.models.functions import Lower
 import uuid
-import string
-import random
+from .ids import user_id_allocator
 
 class UserManager(BaseUserManager):
     """Custom user manager that uses username as primary identifier"""
@@ -58,19 +58,84 @@ class User(AbstractUser):
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
+        constraints = [
+            # Case-insensitive uniqueness, also used by LOWER(email) lookups
+            models.UniqueConstraint(Lower('email'), name='users_email_ci_unique'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.user_id:
-            self.user_id = self.generate_unique_user_id()
+            self.user_id = self.generate_unique_user_id(using=kwargs.get('using'))
         super().save(*args, **kwargs)
     
-    def generate_unique_user_id(self):
+    def generate_unique_user_id(self, using=None):
         """Generate a unique 10-character user ID"""
-        while True:
-            # Generate random 10-character ID with letters and numbers
-            user_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
-            if not User.objects.filter(user_id=user_id).exists():
-                return user_id
+        using = using or router.db_for_write(User, instance=self)
+        return user_id_allocator.allocate(using=using)[0]
     
     def __str__(self):
         return f"{self.full_name} ({self.user_id})"
+
+class IdSequence(models.Model):
+    """Named counters from which unique identifiers are reserved in blocks"""
+    
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'id_sequences'
+    
+    def __str__(self):
+        return f"{self.name} ({self.next_value})"
+
+class RevokedToken(models.Model):
+    """Refresh tokens revoked by logout or rotation, kept until they expire"""
+    
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    # Indexed for the incremental sync in users.blacklist
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'revoked_tokens'
+    
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at})"
+
+class SearchDocumentField(models.TextField):
+    """Column of an FTS5 table, queryable with the `match` lookup"""
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    """Full-text `MATCH` against an FTS5 column"""
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+class UserSearchIndex(models.Model):
+    """
+    Trigram full-text index over the searchable user fields (SQLite FTS5).
+    
+    The table and the triggers that keep it in sync with `users` are created
+    by a migration, so rows are maintained on every write path (save,
+    bulk_create and queryset updates) without any Python code.
+    """
+    
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.DO_NOTHING,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry'
+    )
+    document = SearchDocumentField()
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'users_fts'
+
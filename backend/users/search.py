@@ -0,0 +1,34 @@
+from django.db import connections
+from django.db.models import F, Q
+
+# The trigram tokenizer cannot match substrings shorter than three characters
+MIN_INDEXED_QUERY_LENGTH = 3
+
+
+def fts_phrase(query):
+    """Quote a raw search string as a single FTS5 phrase (substring match)"""
+    return '"{}"'.format(query.replace('"', '""'))
+
+
+def search_users(queryset, query):
+    """
+    Filter `queryset` down to users matching `query`, best matches first.
+    
+    On SQLite the FTS5 trigram index is used and results are ranked by bm25.
+    Very short queries and other database backends fall back to the plain
+    `icontains` scan over the same fields.
+    """
+    if connections[queryset.db].vendor == 'sqlite' and len(query) >= MIN_INDEXED_QUERY_LENGTH:
+        return queryset.filter(
+            search_entry__document__match=fts_phrase(query)
+        ).annotate(
+            search_rank=F('search_entry__rank')
+        ).order_by('search_rank', 'id')
+    
+    return queryset.filter(
+        Q(username__icontains=query) |
+        Q(full_name__icontains=query) |
+        Q(company__icontains=query) |
+        Q(email__icontains=query) |
+        Q(contact__icontains=query)
+    ).order_by('-created_at', '-id')
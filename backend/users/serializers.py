@@ -1,8 +1,58 @@
+import re
+
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.settings import api_settings
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
-from django.contrib.auth import authenticate
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from .blacklist import token_blacklist
+from .hashing import password_hashing_pool
+from .last_login import last_login_buffer
 from .models import User
 
+# Messages for registration fields that must be unique
+UNIQUE_FIELD_ERRORS = {
+    'username': 'A user with that username already exists.',
+    'email': 'A user with this email already exists.',
+    'contact': 'A user with this contact number already exists.',
+}
+
+def unique_constraint_names():
+    """Database names of the unique constraints behind UNIQUE_FIELD_ERRORS"""
+    table = User._meta.db_table
+    names = {'users_email_ci_unique': 'email'}
+    for field_name in UNIQUE_FIELD_ERRORS:
+        column = User._meta.get_field(field_name).column
+        # SQLite reports "table.column", PostgreSQL the "table_column_key" constraint
+        names[f'{table}.{column}'] = field_name
+        names[f'{table}_{column}_key'] = field_name
+    return names
+
+UNIQUE_CONSTRAINT_FIELDS = unique_constraint_names()
+
+def unique_violation_fields(error):
+    """Fields whose unique constraint an IntegrityError names, or None if unrecognised"""
+    diag = getattr(error.__cause__, 'diag', None)
+    if getattr(diag, 'constraint_name', None):
+        names = [diag.constraint_name]
+    else:
+        match = re.match(r'UNIQUE constraint failed: (.+)', str(error))
+        if not match:
+            return None
+        names = [re.sub(r"^index '(.*)'$", r'\1', name.strip()) for name in match.group(1).split(',')]
+    fields = [UNIQUE_CONSTRAINT_FIELDS.get(name) for name in names]
+    if None in fields:
+        return None
+    return list(dict.fromkeys(fields))
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(
@@ -17,36 +67,70 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'username', 'full_name', 'email', 'contact', 'company', 
             'address', 'industry', 'password'
         ]
+        # Uniqueness is checked in a single query by validate() instead of
+        # one UniqueValidator query per field
         extra_kwargs = {
-            'username': {'required': True},
-            'email': {'required': True},
+            'username': {'required': True, 'validators': []},
+            'email': {'required': True, 'validators': []},
             'full_name': {'required': True},
-            'contact': {'required': True},
+            'contact': {'required': True, 'validators': []},
             'company': {'required': True},
             'address': {'required': True},
             'industry': {'required': True},
         }
     
     def validate_email(self, value):
-        """Validate email uniqueness"""
-        if User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
+        """Emails are stored lowercase"""
         return value.lower()
     
-    def validate_contact(self, value):
-        """Validate contact uniqueness"""
-        if User.objects.filter(contact=value).exists():
-            raise serializers.ValidationError("A user with this contact number already exists.")
-        return value
+    def validate(self, attrs):
+        """Validate username, email and contact uniqueness in one query"""
+        # LOWER(email) matches the case-insensitive unique index
+        clashes = User.objects.alias(email_lower=Lower('email')).filter(
+            Q(username=attrs['username']) |
+            Q(email_lower=attrs['email']) |
+            Q(contact=attrs['contact'])
+        ).values_list('username', 'email', 'contact')
+        
+        errors = {}
+        for username, email, contact in clashes:
+            if username == attrs['username']:
+                errors['username'] = UNIQUE_FIELD_ERRORS['username']
+            if email.lower() == attrs['email']:
+                errors['email'] = UNIQUE_FIELD_ERRORS['email']
+            if contact == attrs['contact']:
+                errors['contact'] = UNIQUE_FIELD_ERRORS['contact']
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
     
     def create(self, validated_data):
-        """Create new user"""
+        """
+        Create new user.
+        
+        The async registration view hashes the password itself and passes
+        it as `save(encoded_password=...)`; otherwise it is hashed here.
+        """
         password = validated_data.pop('password')
+        encoded_password = validated_data.pop('encoded_password', None)
         
-        user = User.objects.create_user(
-            password=password,
-            **validated_data
-        )
+        # Hash on the bounded pool rather than the request thread
+        user = User(**validated_data)
+        user.password = encoded_password or password_hashing_pool.run(make_password, password)
+        # Allocated outside the transaction so it comes from the cached block
+        user.user_id = user.generate_unique_user_id()
+        
+        # A concurrent registration can still win the race after validate();
+        # the unique constraints catch it
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError as e:
+            # Anything else (a user_id collision, a new constraint) is a server error
+            fields = unique_violation_fields(e)
+            if not fields:
+                raise
+            raise serializers.ValidationError({field: UNIQUE_FIELD_ERRORS[field] for field in fields})
         return user
 
 class UserLoginSerializer(serializers.Serializer):
@@ -54,27 +138,61 @@ class UserLoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(style={'input_type': 'password'})
     
+    async def aget_user(self):
+        """
+        The user for the validated credentials.
+        
+        Awaited by the async login view, so the password check does not
+        hold a worker thread; errors read like validate() errors.
+        """
+        user = await aauthenticate(
+            request=self.context.get('request'),
+            username=self.validated_data['username'],
+            password=self.validated_data['password']
+        )
+        
+        if not user:
+            raise serializers.ValidationError({drf_settings.NON_FIELD_ERRORS_KEY: ['Invalid username or password.']})
+        
+        if not user.is_active:
+            raise serializers.ValidationError({drf_settings.NON_FIELD_ERRORS_KEY: ['User account is disabled.']})
+        
+        return user
+
+class BufferedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair serializer that records last_login per STATELESS_LOGIN"""
+    
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if settings.STATELESS_LOGIN:
+            last_login_buffer.add(self.user)
+        else:
+            update_last_login(None, self.user)
+        return data
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that honours and maintains the refresh token blacklist"""
+    
     def validate(self, attrs):
-        username = attrs.get('username')
-        password = attrs.get('password')
+        refresh = self.token_class(attrs['refresh'])
+        if token_blacklist.contains(refresh[api_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
         
-        if username and password:
-            user = authenticate(
-                request=self.context.get('request'),
-                username=username,
-                password=password
-            )
-            
-            if not user:
-                raise serializers.ValidationError('Invalid username or password.')
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # Losing the race against a concurrent refresh of the same token
+            # means it has just been rotated, i.e. blacklisted
+            if api_settings.BLACKLIST_AFTER_ROTATION and not token_blacklist.add(refresh):
+                raise TokenError('Token is blacklisted')
             
-            if not user.is_active:
-                raise serializers.ValidationError('User account is disabled.')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
             
-            attrs['user'] = user
-            return attrs
-        else:
-            raise serializers.ValidationError('Must include email and password.')
+            data['refresh'] = str(refresh)
+        
+        return data
 
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile"""
@@ -87,9 +205,35 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'user_id', 'date_joined', 'last_login']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Only the profile view reads the counters and passes them in
+        if 'connection_counts' in self.context:
+            data['connection_counts'] = self.context['connection_counts']
+        return data
+
 class UserSearchSerializer(serializers.ModelSerializer):
     """Serializer for user search results"""
     
     class Meta:
         model = User
         fields = ['id', 'user_id', 'username', 'full_name', 'email', 'company', 'industry']
+
+class UserSearchWithStatusSerializer(UserSearchSerializer):
+    """Serializer for user search results with the caller's connection status"""
+    connection_status = serializers.CharField(read_only=True)
+    connection_id = serializers.IntegerField(read_only=True, allow_null=True)
+    
+    class Meta(UserSearchSerializer.Meta):
+        fields = UserSearchSerializer.Meta.fields + ['connection_status', 'connection_id']
+
+
+class UserBatchLookupSerializer(serializers.Serializer):
+    """Serializer for looking up many users by user_id at once"""
+    MAX_USER_IDS = 500
+    
+    user_ids = serializers.ListField(
+        child=serializers.CharField(max_length=10),
+        allow_empty=False,
+        max_length=MAX_USER_IDS
+    )
@@ -0,0 +1,30 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import invalidate_cached_user
+from .autocomplete import INDEXED_FIELDS, autocomplete_index
+from .models import User
+
+@receiver(post_save, sender=User)
+def update_autocomplete_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the in-process autocomplete index in step with committed user edits"""
+    # Saves like last_login updates do not touch anything that is indexed
+    if update_fields and not set(update_fields) & {*INDEXED_FIELDS, 'is_active'}:
+        return
+    transaction.on_commit(partial(autocomplete_index.update, instance))
+
+@receiver(post_delete, sender=User)
+def remove_from_autocomplete_index(sender, instance, **kwargs):
+    """Drop deleted users from the autocomplete index"""
+    transaction.on_commit(partial(autocomplete_index.remove, instance.pk))
+
+@receiver(post_save, sender=User)
+def invalidate_authentication_cache(sender, instance, **kwargs):
+    """Profile edits and deactivation must not be served from the cache"""
+    invalidate_cached_user(instance)
+
+@receiver(post_delete, sender=User)
+def remove_from_authentication_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance)
@@ -0,0 +1,9 @@
+from celery import shared_task
+from .blacklist import token_blacklist
+
+@shared_task
+def prune_revoked_tokens(chunk_size=None):
+    """Delete revoked refresh tokens that have expired anyway"""
+    deleted_count = token_blacklist.prune(chunk_size=chunk_size)
+    
+    return f"Pruned {deleted_count} expired revoked tokens"
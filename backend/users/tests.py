@@ -1,3 +1,315 @@
-from django.test import TestCase
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from backend.testing import QueryBudgetTestCase, make_user
+from . import backends
+from .autocomplete import PrefixIndex, autocomplete_index
+from .blacklist import TokenBlacklist
+from .hashing import HashingPoolBusy, password_hashing_pool
+from .last_login import last_login_buffer
+from .models import RevokedToken, User
+
+CREDENTIALS = {'username': 'alice', 'password': 'Correct-horse-42'}
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """Hot user endpoints stay within their QUERY_BUDGET"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice', company='Acme', industry='Tech')
+        self.others = [make_user(f'user{index}', company='Acme') for index in range(5)]
+        self.authenticate(self.user)
+        self.clear_caches()
+
+    def test_profile(self):
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_search(self):
+        response = self.client.get('/api/auth/search/', {'q': 'user', 'include_status': 'true'})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertWithinQueryBudget(response)
+
+    def test_autocomplete(self):
+        response = self.client.get('/api/auth/autocomplete/', {'q': 'us'})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertWithinQueryBudget(response)
+
+    def test_batch(self):
+        user_ids = [user.user_id for user in self.others] + ['MISSING000']
+        response = self.client.post('/api/auth/batch/', {'user_ids': user_ids}, format='json')
+        self.assertEqual(response.data['not_found'], ['MISSING000'])
+        self.assertWithinQueryBudget(response)
+
+
+class ProfileTests(QueryBudgetTestCase):
+    """The profile is read fresh, whatever the authentication cache holds"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice', company='Acme')
+        self.authenticate(self.user)
+        self.clear_caches()
+
+    def test_edit_made_elsewhere_is_visible(self):
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['company'], 'Acme')
+
+        # Another process's edit: no signal reaches this one's cache
+        User.objects.filter(pk=self.user.pk).update(company='Globex')
+        response = self.client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['company'], 'Globex')
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/auth/profile/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_unchanged_profile_is_not_modified(self):
+        response = self.client.get('/api/auth/profile/')
+        response = self.client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class AuthenticationTests(APITestCase):
+    """Registration and login answer like before, now from async views"""
+
+    def setUp(self):
+        # Write buffered logins to the test database, not at interpreter exit
+        self.addCleanup(last_login_buffer.flush)
+
+    def register(self):
+        return self.client.post('/api/auth/register/', {
+            **CREDENTIALS,
+            'email': 'alice@example.com',
+            'full_name': 'Alice',
+            'contact': '9800000000',
+            'company': 'Acme',
+            'address': 'Street 1',
+            'industry': 'Tech',
+        }, format='json')
+
+    def test_register_and_login(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username='alice').check_password(CREDENTIALS['password']))
+
+        response = self.client.post('/api/auth/login/', CREDENTIALS, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['username'], 'alice')
+        self.assertIn('access', response.data['tokens'])
+
+    def test_errors_keep_their_format(self):
+        self.register()
+        response = self.register()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'username', 'email', 'contact'})
+
+        response = self.client.post('/api/auth/login/', {**CREDENTIALS, 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'non_field_errors': ['Invalid username or password.']})
+
+        response = self.client.post('/api/auth/login/', {'username': 'alice'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.data)
+
+    def test_busy_pool_is_a_503(self):
+        with mock.patch.object(password_hashing_pool, 'submit', side_effect=HashingPoolBusy(wait=1)):
+            response = self.client.post('/api/auth/login/', CREDENTIALS, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class AsyncLoginTests(TestCase):
+    """A login waiting on the hashing pool does not hold up the event loop"""
+
+    def setUp(self):
+        make_user(CREDENTIALS['username'], password=CREDENTIALS['password'])
+        self.addCleanup(last_login_buffer.flush)
+
+    async def test_event_loop_runs_while_hashing(self):
+        hashing, release = threading.Event(), threading.Event()
+
+        def verify_password(*args):
+            hashing.set()
+            release.wait(5)
+            return real_verify_password(*args)
+
+        real_verify_password = backends.verify_password
+        with mock.patch.object(backends, 'verify_password', verify_password):
+            login = asyncio.create_task(
+                self.async_client.post('/api/auth/login/', CREDENTIALS, content_type='application/json')
+            )
+            while not hashing.is_set():
+                await asyncio.sleep(0.01)
+            # The hash is blocked on the pool, yet this coroutine keeps running
+            await asyncio.sleep(0.05)
+            self.assertFalse(login.done())
+            release.set()
+            response = await login
+        self.assertEqual(response.status_code, 200)
+
+
+@mock.patch('users.autocomplete.REFRESH_INTERVAL', 0)
+class AutocompleteIndexTests(QueryBudgetTestCase):
+    """The index catches up with other processes without blocking lookups"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [make_user(f'alice{index}') for index in range(3)]
+        self.clear_caches()
+
+    def usernames(self, prefix='alice'):
+        return sorted(user['username'] for user in autocomplete_index.lookup(prefix))
+
+    def test_edits_from_elsewhere_are_caught_up(self):
+        self.usernames()
+        # Another process's edit and registration: no signal reaches this one
+        User.objects.filter(pk=self.users[0].pk).update(username='alicia', updated_at=timezone.now())
+        User.objects.bulk_create([User(username='alice9', email='alice9@example.com', contact='1')])
+        with mock.patch.object(PrefixIndex, '_reload_in_background') as reload:
+            self.assertEqual(self.usernames('ali'), ['alice1', 'alice2', 'alice9', 'alicia'])
+        reload.assert_not_called()
+
+    def test_registration_between_reads_does_not_reload(self):
+        self.usernames()
+        User.objects.filter(pk=self.users[0].pk).update(company='Acme', updated_at=timezone.now())
+        real_watermark = PrefixIndex._watermark
+
+        def watermark(index):
+            # A registration commits right after the watermark was read
+            result = real_watermark(index)
+            User.objects.bulk_create([User(username='alice9', email='alice9@example.com', contact='1')])
+            return result
+
+        with mock.patch.object(PrefixIndex, '_watermark', watermark), \
+                mock.patch.object(PrefixIndex, '_reload_in_background') as reload:
+            self.assertIn('alice9', self.usernames())
+        reload.assert_not_called()
+
+    def test_rebuild_does_not_block_lookups(self):
+        self.usernames()
+        # A queryset update skips updated_at, so only the count shows it
+        User.objects.filter(pk=self.users[0].pk).update(is_active=False)
+        building, release = threading.Event(), threading.Event()
+        real_build = PrefixIndex._build
+
+        def build(index):
+            building.set()
+            release.wait(5)
+            return real_build(index)
+
+        with mock.patch.object(PrefixIndex, '_build', build):
+            self.usernames()
+            self.assertTrue(building.wait(5))
+            # Served from the old index while the new one is read
+            self.assertEqual(self.usernames(), ['alice0', 'alice1', 'alice2'])
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == 'autocomplete-reload':
+                    thread.join(5)
+        self.assertEqual(self.usernames(), ['alice1', 'alice2'])
+
+
+def wait_for_threads(name):
+    for thread in threading.enumerate():
+        if thread.name == name:
+            thread.join(5)
+
+
+@override_settings(TOKEN_BLACKLIST={'SYNC_INTERVAL': 0})
+class TokenBlacklistTests(QueryBudgetTestCase):
+    """Revoked refresh tokens are found, whichever process revoked them"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('alice')
+        self.blacklist = TokenBlacklist()
+
+    def revoke_elsewhere(self, **fields):
+        """A revocation committed by another process, invisible to this one's filter"""
+        token = RefreshToken.for_user(self.user)
+        RevokedToken.objects.create(jti=token['jti'], expires_at=timezone.now() + timedelta(days=1), **fields)
+        return token['jti']
+
+    def build(self):
+        self.blacklist.contains('warm-up')
+        wait_for_threads('token-blacklist-rebuild')
+        self.assertIsNotNone(self.blacklist._filter)
+
+    def test_add_and_contains(self):
+        token = RefreshToken.for_user(self.user)
+        self.build()
+        self.assertFalse(self.blacklist.contains(token['jti']))
+        self.assertTrue(self.blacklist.add(token))
+        self.assertTrue(self.blacklist.contains(token['jti']))
+        self.assertFalse(self.blacklist.add(token))
+
+    def test_contains_before_the_first_build(self):
+        jti = self.revoke_elsewhere()
+        with mock.patch.object(TokenBlacklist, '_build', side_effect=RuntimeError), \
+                self.assertLogs('users.blacklist', 'ERROR'):
+            self.assertTrue(self.blacklist.contains(jti))
+            wait_for_threads('token-blacklist-rebuild')
+        self.assertFalse(self.blacklist.contains('never-revoked'))
+
+    def test_late_commit_with_a_lower_id_is_synced(self):
+        self.revoke_elsewhere(id=100)
+        self.build()
+        # Its id and timestamp were taken before the filter was read, its
+        # commit landed after
+        jti = self.revoke_elsewhere(id=50)
+        RevokedToken.objects.filter(jti=jti).update(revoked_at=timezone.now() - timedelta(seconds=5))
+        self.blacklist.contains('sync')
+        self.assertIn(jti, self.blacklist._filter)
+
+    def test_revocations_during_a_rebuild_are_kept(self):
+        self.build()
+        read, release = threading.Event(), threading.Event()
+        real_build = TokenBlacklist._build
+
+        def build(blacklist):
+            result = real_build(blacklist)
+            read.set()
+            release.wait(5)
+            return result
+
+        token = RefreshToken.for_user(self.user)
+        with override_settings(TOKEN_BLACKLIST={'REBUILD_INTERVAL': 0}), \
+                mock.patch.object(TokenBlacklist, '_build', build):
+            self.blacklist.contains('rebuild')
+            self.assertTrue(read.wait(5))
+            # Lookups are answered from the old filter meanwhile
+            self.assertFalse(self.blacklist.contains(token['jti']))
+            self.blacklist.add(token)
+            release.set()
+            wait_for_threads('token-blacklist-rebuild')
+        self.assertIn(token['jti'], self.blacklist._filter)
+
+    def test_replayed_refresh_token_is_rejected(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], refresh)
+
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_prune_deletes_only_expired_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            RevokedToken(jti=f'jti{index}', expires_at=now + timedelta(hours=1 if index % 3 == 0 else -1))
+            for index in range(7)
+        )
+        self.assertEqual(self.blacklist.prune(chunk_size=2), 4)
+        self.assertEqual(sorted(RevokedToken.objects.values_list('jti', flat=True)), ['jti0', 'jti3', 'jti6'])
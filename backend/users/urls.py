@@ -1,18 +1,22 @@
 from django.urls import path
 from .views import (
-    UserRegistrationView,
-    UserLoginView,
     UserProfileView,
     UserSearchView,
-    logout_view
+    autocomplete_view,
+    batch_lookup_view,
+    login_view,
+    logout_view,
+    register_view
 )
 
 app_name = 'users'
 
 urlpatterns = [
-    path('register/', UserRegistrationView.as_view(), name='register'),
-    path('login/', UserLoginView.as_view(), name='login'),
+    path('register/', register_view, name='register'),
+    path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('search/', UserSearchView.as_view(), name='search'),
+    path('autocomplete/', autocomplete_view, name='autocomplete'),
+    path('batch/', batch_lookup_view, name='batch'),
 ]
\ No newline at end of file
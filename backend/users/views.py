@@ -1,96 +1,189 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import login
-from django.db.models import Q
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import alogin
+from django.contrib.auth.hashers import make_password
+from django.utils.functional import cached_property
+from backend.async_views import async_api_view
+from backend.conditional import ConditionalGetMixin
+from connections.counters import counter_counts
+from connections.status import annotate_connection_status
+from .authentication import invalidate_cached_user
 from .models import User
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, autocomplete_index
+from .blacklist import token_blacklist
+from .hashing import password_hashing_pool
+from .last_login import last_login_buffer
+from .search import search_users
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
     UserProfileSerializer,
-    UserSearchSerializer
+    UserSearchSerializer,
+    UserSearchWithStatusSerializer,
+    UserBatchLookupSerializer
 )
 
-@method_decorator(csrf_exempt, name='dispatch')
-class UserRegistrationView(generics.CreateAPIView):
+# Login and registration are native async views: the password hash is
+# awaited on the hashing pool, so under ASGI the event loop keeps serving
+# other requests instead of a worker thread waiting on PBKDF2
+
+@async_api_view
+async def register_view(request):
     """API endpoint for user registration"""
-    queryset = User.objects.all()
-    serializer_class = UserRegistrationSerializer
-    permission_classes = [AllowAny]
-    
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'message': 'User registered successfully',
-            'user_id': user.user_id,
-            'user': UserProfileSerializer(user).data,
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            }
-        }, status=status.HTTP_201_CREATED)
+    serializer = UserRegistrationSerializer(data=request.data, context={'request': request})
+    await sync_to_async(serializer.is_valid)(raise_exception=True)
+    
+    encoded_password = await password_hashing_pool.arun(make_password, serializer.validated_data['password'])
+    user = await sync_to_async(serializer.save)(encoded_password=encoded_password)
+    
+    # Generate JWT tokens
+    refresh = RefreshToken.for_user(user)
+    
+    return Response({
+        'message': 'User registered successfully',
+        'user_id': user.user_id,
+        'user': UserProfileSerializer(user).data,
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    }, status=status.HTTP_201_CREATED)
 
-@method_decorator(csrf_exempt, name='dispatch')
-class UserLoginView(generics.GenericAPIView):
+@async_api_view
+async def login_view(request):
     """API endpoint for user login"""
-    serializer_class = UserLoginSerializer
-    permission_classes = [AllowAny]
+    serializer = UserLoginSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
     
-    def post(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        user = serializer.validated_data['user']
-        login(request, user)
-        
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'message': 'Login successful',
-            'user': UserProfileSerializer(user).data,
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            }
-        }, status=status.HTTP_200_OK)
+    user = await serializer.aget_user()
+    if settings.STATELESS_LOGIN:
+        # Tokens only: no session row, last_login written in batches
+        await sync_to_async(last_login_buffer.add)(user)
+    else:
+        await alogin(request, user)
+    
+    # Generate JWT tokens
+    refresh = RefreshToken.for_user(user)
+    
+    return Response({
+        'message': 'Login successful',
+        'user': UserProfileSerializer(user).data,
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    }, status=status.HTTP_200_OK)
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """API endpoint for user profile"""
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        return self.profile
+    
+    @cached_property
+    def profile(self):
+        """
+        The user's row read fresh, with their counters in the same query.
+        
+        `request.user` may come from the authentication cache, which does
+        not see edits or deactivations made by other processes.
+        """
+        user = User.objects.select_related('connection_counter').filter(pk=self.request.user.pk).first()
+        if user is None or not user.is_active:
+            invalidate_cached_user(self.request.user)
+            if user is None:
+                raise AuthenticationFailed('User not found', code='user_not_found')
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+    
+    @cached_property
+    def connection_counts(self):
+        return counter_counts(getattr(self.profile, 'connection_counter', None))
+    
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'connection_counts': self.connection_counts}
+    
+    def get_watermark(self):
+        # The row is read fresh anyway, so the watermark is the data itself:
+        # writes that skip updated_at (last_login, bulk updates) still count
+        user = self.profile
+        return tuple(getattr(user, field) for field in self.serializer_class.Meta.fields), self.connection_counts
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(super().retrieve, request, *args, **kwargs)
 
 class UserSearchView(generics.ListAPIView):
     """API endpoint for searching users"""
     serializer_class = UserSearchSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def include_status(self):
+        return self.request.query_params.get('include_status', '').lower() in ('true', '1')
+    
+    def get_serializer_class(self):
+        if self.include_status():
+            return UserSearchWithStatusSerializer
+        return UserSearchSerializer
+    
     def get_queryset(self):
         query = self.request.query_params.get('q', '')
         if not query:
             return User.objects.none()
         
         # Search by username, name, company, email, or contact
-        return User.objects.filter(
-            Q(username__icontains=query) |
-            Q(full_name__icontains=query) |
-            Q(company__icontains=query) |
-            Q(email__icontains=query) |
-            Q(contact__icontains=query)
-        ).exclude(id=self.request.user.id)
+        queryset = User.objects.exclude(id=self.request.user.id)
+        queryset = search_users(queryset, query)
+        
+        # Connection status is computed by subqueries in the same query
+        if self.include_status():
+            queryset = annotate_connection_status(queryset, self.request.user)
+        return queryset
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def autocomplete_view(request):
+    """API endpoint for type-ahead suggestions, served from memory"""
+    query = request.query_params.get('q', '')
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return Response({
+            'error': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    limit = max(1, min(limit, MAX_LIMIT))
+    results = autocomplete_index.lookup(query, limit=limit, exclude=request.user.id)
+    
+    return Response({
+        'results': results
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def batch_lookup_view(request):
+    """API endpoint for resolving many user_ids in a single query"""
+    serializer = UserBatchLookupSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    # Preserve the caller's order, ignoring repeated ids
+    user_ids = list(dict.fromkeys(serializer.validated_data['user_ids']))
+    users = User.objects.filter(user_id__in=user_ids).only(*UserSearchSerializer.Meta.fields).order_by()
+    users_by_id = {user.user_id: user for user in users}
+    
+    return Response({
+        'results': UserSearchSerializer(
+            [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id],
+            many=True
+        ).data,
+        'not_found': [user_id for user_id in user_ids if user_id not in users_by_id]
+    }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -100,7 +193,7 @@ def logout_view(request):
         refresh_token = request.data.get('refresh_token')
         if refresh_token:
             token = RefreshToken(refresh_token)
-            token.blacklist()
+            token_blacklist.add(token)
         
         return Response({
             'message': 'Successfully logged out'